@@ -0,0 +1,66 @@
+"""
+    Compare the full and the header-only decoding of the event documents
+    received from Kafka, for events with large detector readings.
+
+    python benchmarks/decoding.py --size 4 --fields 2
+"""
+import time
+import argparse
+import msgpack_numpy
+import numpy as np
+from sophys_gui.server.documents import decodeDocument, decodeDocumentHeader
+
+
+def createEvent(seq_num, size, fields=1):
+    """
+        Create an event message with image readings of about size bytes.
+    """
+    shape = (max(int((size / fields / 8) ** 0.5), 1), ) * 2
+    data = {"det{}".format(n): np.random.random(shape) for n in range(fields)}
+    document = {
+        "uid": "event-{}".format(seq_num), "time": time.time(),
+        "descriptor": "primary-descriptor", "seq_num": seq_num,
+        "data": data, "timestamps": {key: time.time() for key in data},
+        "filled": {key: True for key in data}
+    }
+    return msgpack_numpy.packb(("event", document))
+
+
+def measure(decode, messages, duration):
+    """
+        Decode the messages in a loop for about duration seconds and return the
+        documents decoded per second.
+    """
+    count = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < duration:
+        for message in messages:
+            decode(message)
+        count += len(messages)
+        elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the full and the header-only decoding of event documents.")
+    parser.add_argument("--size", type=float, default=1.0, help="Size of the events in MB.")
+    parser.add_argument("--fields", type=int, default=1, help="Data fields per event.")
+    parser.add_argument("--count", type=int, default=20, help="Distinct events to decode.")
+    parser.add_argument("--duration", type=float, default=2.0, help="Seconds per measurement.")
+    args = parser.parse_args()
+
+    messages = [
+        createEvent(seq_num, args.size * 1e6, args.fields)
+        for seq_num in range(1, args.count + 1)]
+    size = sum(len(message) for message in messages) / len(messages) / 1e6
+    print("Events of {:.2f} MB with {} data field(s)".format(size, args.fields))
+    full = measure(decodeDocument, messages, args.duration)
+    print("Full decoding: {:.0f} documents/s".format(full))
+    header = measure(decodeDocumentHeader, messages, args.duration)
+    print("Header-only decoding: {:.0f} documents/s ({:.1f}x)".format(header, header / full))
+
+
+if __name__ == "__main__":
+    main()
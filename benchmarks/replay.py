@@ -0,0 +1,115 @@
+"""
+    Replay a Queue Server trace, recorded with sophys-gui --record-trace, against
+    the server model and the queue and history tables, and report how long the
+    model updates and the renders of the tables took and the peak memory use.
+
+    python benchmarks/replay.py session.trace --speed 60
+"""
+import os
+import sys
+import math
+import time
+import argparse
+import tempfile
+import tracemalloc
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtWidgets import QApplication
+from sophys_gui.server import ServerModel
+from sophys_gui.server.trace import TraceReplay
+from sophys_gui.components.list_models import QueueModel, HistoryModel
+
+
+class Timings:
+    """
+        Durations and memory peaks of the updates of a list model.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.updates = []
+        self.renders = []
+        self.peaks = []
+
+    def report(self):
+        print("{}: {} updates".format(self.name, len(self.updates)))
+        for label, values in (("update", self.updates), ("render", self.renders)):
+            if not values:
+                continue
+            values = sorted(values)
+            print("  {:6} mean {:7.2f} ms  p95 {:7.2f} ms  max {:7.2f} ms".format(
+                label, sum(values) / len(values) * 1000,
+                values[math.ceil(0.95 * len(values)) - 1] * 1000, values[-1] * 1000))
+        if self.peaks:
+            print("  memory peak during an update {:.1f} MB".format(max(self.peaks) / 1e6))
+
+
+def measureUpdates(model, timings, rows):
+    """
+        Time each list update of a model and the render of its first rows,
+        as done by a table repainting after the update.
+    """
+    onPlanListChanged = model.onPlanListChanged
+
+    def timedUpdate(planList):
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        onPlanListChanged(planList)
+        timings.updates.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        for row in range(min(rows, model.rowCount())):
+            for column in range(model.columnCount()):
+                model.data(model.index(row, column), Qt.DisplayRole)
+        timings.renders.append(time.perf_counter() - start)
+        timings.peaks.append(tracemalloc.get_traced_memory()[1])
+
+    model.planListChanged.disconnect(onPlanListChanged)
+    model.planListChanged.connect(timedUpdate)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay a Queue Server trace against the queue and history models.")
+    parser.add_argument("trace", help="Trace recorded with sophys-gui --record-trace.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, e.g. 60 replays an hour in a minute.")
+    parser.add_argument("--rows", type=int, default=50, help="Rows rendered after each update, as shown by the table.")
+    parser.add_argument("--poll-floor", type=float, default=0.2, help="Shortest interval in seconds between status requests.")
+    parser.add_argument("--poll-ceiling", type=float, default=5.0, help="Longest interval in seconds between status requests.")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication(sys.argv)
+    server = TraceReplay(args.trace, args.speed)
+    uri = server.start()
+    print("Replaying {:.1f} s of trace at {}x from {}".format(
+        server.duration, args.speed, uri))
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory(prefix="sophys-gui-replay") as cache_dir:
+        start = time.perf_counter()
+        model = ServerModel(
+            uri, poll_floor=args.poll_floor, poll_ceiling=args.poll_ceiling,
+            cache_path=os.path.join(cache_dir, "snapshot.msgpack"))
+        startup = time.perf_counter() - start
+        queue = QueueModel(model, "up_down")
+        history = HistoryModel(model)
+        timings = [Timings("Queue"), Timings("History")]
+        measureUpdates(queue, timings[0], args.rows)
+        measureUpdates(history, timings[1], args.rows)
+
+        timer = QTimer()
+        timer.timeout.connect(lambda: server.isFinished() and app.quit())
+        timer.start(100)
+        app.exec_()
+        model.exit()
+        server.stop()
+
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("Server model startup {:.1f} ms".format(startup * 1000))
+    for timing in timings:
+        timing.report()
+    print("Memory in use {:.1f} MB, peak {:.1f} MB".format(current / 1e6, peak / 1e6))
+
+
+if __name__ == "__main__":
+    main()
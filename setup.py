@@ -16,6 +16,7 @@ setup(
         'assonant[naming-standards]',
         'sophys_live_view',
         'PyYAML',
+        'msgpack',
     ],
     include_package_data=True,
     packages=find_packages(),
@@ -23,6 +24,9 @@ setup(
     entry_points={
         'gui_scripts': [
             'sophys-gui = sophys_gui.__main__:main',
+        ],
+        'console_scripts': [
+            'sophys-gui-fakeserver = sophys_gui.server.fake:main',
         ]
     }
 )
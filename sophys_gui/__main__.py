@@ -5,10 +5,10 @@ import sys
 
 import qtawesome
 
-from sophys_gui.server import ServerModel
+from sophys_gui.server import ServerModel, KafkaDocumentBroker
 from sophys_gui.components import SophysApplication
 from sophys_gui.operation import SophysOperationGUI
-from sophys_live_view.utils.kafka_data_source import KafkaDataSource
+from sophys_gui.operation.data_source import SophysKafkaDataSource
 
 def main():
     parser = argparse.ArgumentParser()
@@ -19,12 +19,18 @@ def main():
     parser.add_argument("--reading-order", required=False, default='up_down', help="The reading order of the parameters in the form for the addition of a new plan.")
     parser.add_argument("--show-all-logs", required=False, default=False, help="Don't hide the queue server logs")
     parser.add_argument("--yml-file-path", required=False, default=None, help="Path to a yaml file for the customize sophys form.")
+    parser.add_argument("--poll-floor", required=False, type=float, default=0.2, help="Shortest interval in seconds between Queue Server status requests, used while a queue is running.")
+    parser.add_argument("--poll-ceiling", required=False, type=float, default=5.0, help="Longest interval in seconds between Queue Server status requests, reached while the server is idle or unreachable.")
+    parser.add_argument("--cache-file", required=False, default=None, help="Path of the local snapshot of the Queue Server state shown at startup. Defaults to a file per server in the user cache directory.")
+    parser.add_argument("--record-trace", required=False, default=None, help="Record every response of the Queue Server to this file, to be replayed with sophys-gui-fakeserver --replay.")
     args = parser.parse_args()
 
-    __backend_model = ServerModel(args.http_server, args.http_server_api_key)
-    __kafka_data_source = KafkaDataSource(
-        args.kafka_topic, [args.kafka_bootstrap], hour_offset=1
-    )
+    __backend_model = ServerModel(
+        args.http_server, args.http_server_api_key, args.poll_floor, args.poll_ceiling,
+        args.cache_file, args.record_trace)
+    __kafka_broker = KafkaDocumentBroker.getBroker(
+        args.kafka_bootstrap, args.kafka_topic, __backend_model.startWorker)
+    __kafka_data_source = SophysKafkaDataSource(__kafka_broker, hour_offset=1)
     app = SophysApplication(sys.argv)
     has_api_key = True if args.http_server_api_key else False
     window = SophysOperationGUI(
@@ -7,5 +7,5 @@ from .input import SophysInputList, SophysInputDict, SophysSpinBox, \
     SophysInputMotor, SophysComboBox
 from .console import SophysConsoleMonitor
 from .login import SophysLogin
-from .led import SophysLed
+from .led import SophysLed, SophysConnectionLed
 from .form import SophysForm, SophysMetadataForm
\ No newline at end of file
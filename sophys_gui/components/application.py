@@ -85,14 +85,6 @@ class SophysApplication(QApplication):
         """
         exception = str(excvalue)
         messageCode = self.getErrorCode(exception)
-        if messageCode == "401" and self.runEngineClient:
-                authKeys = self.runEngineClient.auth_key
-                try:
-                    clientData = self.runEngineClient.session_refresh(refresh_token=authKeys[1])
-                    self.saveRunEngineClient(clientData["refresh_token"])
-                    return "User Session Refreshed!!"
-                except Exception:
-                    print("Could not refresh the user session!")
         for code, errorMsg in self.codeErrors.items():
             if code == messageCode:
                 return errorMsg
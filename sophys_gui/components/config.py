@@ -0,0 +1,136 @@
+import os
+from types import MappingProxyType
+from qtpy.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+from sophys_gui.functions import openYaml
+
+
+class SophysDisplayConfigSnapshot:
+    """
+        Immutable lookup table compiled from the display configuration file,
+        with the display name, parameter titles and parameter groups of each plan.
+    """
+
+    def __init__(self, config=None):
+        names = {}
+        titles = {}
+        groupTitles = {}
+        layouts = {}
+        for planName, planConfig in (config or {}).items():
+            if not isinstance(planConfig, dict):
+                continue
+            if "name" in planConfig:
+                names[planName] = planConfig["name"]
+            paramNames = planConfig.get("param_names", {})
+            if not isinstance(paramNames, dict):
+                paramNames = {}
+            isGrouped = any(isinstance(value, dict) for value in paramNames.values())
+            planTitles = {}
+            if isGrouped:
+                planGroups = {}
+                layout = []
+                for groupName, groupParams in paramNames.items():
+                    if not isinstance(groupParams, dict):
+                        continue
+                    planTitles.update(groupParams)
+                    planGroups[groupName] = MappingProxyType(dict(groupParams))
+                    layout.append((groupName, tuple(groupParams.keys())))
+                groupTitles[planName] = MappingProxyType(planGroups)
+            else:
+                planTitles.update(paramNames)
+                layout = [(None, tuple(paramNames.keys()))]
+            titles[planName] = MappingProxyType(planTitles)
+            layouts[planName] = tuple(layout)
+        self._names = MappingProxyType(names)
+        self._titles = MappingProxyType(titles)
+        self._groupTitles = MappingProxyType(groupTitles)
+        self._layouts = MappingProxyType(layouts)
+
+    def getDisplayName(self, planName):
+        """
+            Get the display name of a plan.
+        """
+        return self._names.get(planName, planName)
+
+    def getParamTitle(self, planName, paramName, groupName=None):
+        """
+            Get the display title of a plan parameter.
+        """
+        if groupName is not None and planName in self._groupTitles:
+            return self._groupTitles[planName].get(groupName, {}).get(paramName, paramName)
+        return self._titles.get(planName, {}).get(paramName, paramName)
+
+    def getParamTitles(self, planName):
+        """
+            Get the flat map of parameter display titles of a plan.
+        """
+        return self._titles.get(planName, MappingProxyType({}))
+
+    def getLayout(self, planName):
+        """
+            Get the parameter groups of a plan as (group name, parameter names)
+            pairs, or None if the plan is not configured.
+        """
+        return self._layouts.get(planName, None)
+
+    def isGrouped(self, planName):
+        """
+            Check if the parameters of a plan are split in groups.
+        """
+        return planName in self._groupTitles
+
+
+class SophysDisplayConfig(QObject):
+    """
+        Service that loads the display configuration file once and
+        publishes a new snapshot of it whenever the file changes.
+    """
+
+    configChanged = Signal(object)
+    _instances = {}
+
+    def __init__(self, yml_file_path=None, parent=None):
+        super().__init__(parent)
+        self.yml_file_path = yml_file_path
+        self.snapshot = SophysDisplayConfigSnapshot()
+        self.watcher = None
+        if self.yml_file_path:
+            self.snapshot = SophysDisplayConfigSnapshot(openYaml(self.yml_file_path))
+            self.reloadTimer = QTimer(self)
+            self.reloadTimer.setSingleShot(True)
+            self.reloadTimer.setInterval(200)
+            self.reloadTimer.timeout.connect(self.reload)
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.fileChanged.connect(lambda _: self.reloadTimer.start())
+            self.watchFile()
+
+    @classmethod
+    def fromPath(cls, yml_file_path):
+        """
+            Get the configuration service shared by all the widgets
+            that use the same file.
+        """
+        if yml_file_path not in cls._instances:
+            cls._instances[yml_file_path] = cls(yml_file_path)
+        return cls._instances[yml_file_path]
+
+    def watchFile(self):
+        """
+            Watch the configuration file again if it was replaced by the editor.
+        """
+        isWatched = self.yml_file_path in self.watcher.files()
+        if not isWatched and os.path.exists(self.yml_file_path):
+            self.watcher.addPath(self.yml_file_path)
+
+    def reload(self):
+        """
+            Parse the configuration file and publish the new snapshot,
+            keeping the current one if the file is invalid.
+        """
+        self.watchFile()
+        try:
+            snapshot = SophysDisplayConfigSnapshot(openYaml(self.yml_file_path))
+        except Exception as e:
+            print("Couldn't reload the display configuration:", e)
+            return
+        self.snapshot = snapshot
+        self.configChanged.emit(snapshot)
@@ -1,7 +1,6 @@
 from qtpy.QtCore import Qt, Signal, Slot
 from qtpy.QtGui import QTextOption, QColor
 from qtpy.QtWidgets import QTextEdit, QScrollArea
-from suitscase.utilities.threading import AsyncFunction
 
 
 class SophysConsoleMonitor(QScrollArea):
@@ -28,7 +27,9 @@ class SophysConsoleMonitor(QScrollArea):
         self.appendLine.connect(self.onAppendLine)
 
         self._setupUi()
-        self.serverMonitor()
+        model.startWorker(
+            "console monitor", self.serverMonitor,
+            self.run_engine.stop_console_output_monitoring)
 
     @Slot(str)
     def onAppendLine(self, line: str):
@@ -50,7 +51,6 @@ class SophysConsoleMonitor(QScrollArea):
         self.console.append(line)
         self.scrollBar.setValue(self.scrollBar.maximum())
 
-    @AsyncFunction
     def serverMonitor(self):
         """
             Monitor and send new labels for the label widget.
@@ -8,13 +8,12 @@ from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QDialog, QDialogButtonBox, QGridLayout, \
     QComboBox, QGroupBox, QLineEdit, QLabel, QVBoxLayout, \
     QApplication, QCompleter, QComboBox, QWidget, QPushButton
-from sophys_gui.functions import evaluateValue, getMotorInput, openYaml
+from sophys_gui.functions import evaluateValue, parseParameter
 from ..input import SophysInputList, SophysInputDict, SophysSpinBox, \
     SophysInputMotor, SophysComboBox
 from .metadata import SophysMetadataForm
-from .util import UNKNOWN_TYPES
+from ..config import SophysDisplayConfig
 
-NoneType = type(None)
 
 
 class SophysForm(QDialog):
@@ -39,7 +38,8 @@ class SophysForm(QDialog):
     """
     def __init__(
             self, model, modalMode, allowedParameters, allowedNames, yml_file_path = None, hasEnv=True, metadata_updater="",
-            form_gui_widget = "", max_rows = 3, max_cols = 3, showOnlyInputs = False, readingOrder="up_down"):
+            form_gui_widget = "", max_rows = 3, max_cols = 3, showOnlyInputs = False, readingOrder="up_down",
+            catalog=None):
         super().__init__()
 
         self.yml_file_path = yml_file_path
@@ -50,6 +50,7 @@ class SophysForm(QDialog):
         self.form_gui_widget = form_gui_widget
         self.allowedParameters = allowedParameters
         self.allowedNames = allowedNames
+        self.catalog = catalog
         self.inputWidgets = {}
         self.model = model
         self.modalMode = modalMode
@@ -59,7 +60,8 @@ class SophysForm(QDialog):
         self.md_widget = None
         self.global_metadata_updater = metadata_updater
         self.itemType = "instruction" if "instruction" in modalMode else "plan"
-        self.config = openYaml(self.yml_file_path)
+        self.config = SophysDisplayConfig.fromPath(self.yml_file_path).snapshot
+        self.group_name = None
         self.setupUi()
 
     def accept(self):
@@ -325,20 +327,23 @@ class SophysForm(QDialog):
             inputType = "__MOVABLE__"
         return SophysInputList(self.model, inputType, not isGrouped)
 
+    def getParamInfo(self, paramMeta):
+        """
+            Get the parsed parameter metadata, from the plan catalog if available.
+        """
+        if self.catalog is not None:
+            paramInfo = self.catalog.getParameter(
+                self.itemType, self.chosenItem, paramMeta["name"])
+            if paramInfo is not None:
+                return paramInfo
+        return parseParameter(paramMeta)
+
     def getInputTooltip(self, param):
         """
             Get the parameter description for the input tooltip.
         """
-        hasDescription = "description" in param
-        if hasDescription:
-            description = param["description"]
-            try:
-                extraIdx = description.index("-.-")
-                description = description[:extraIdx]
-            except Exception:
-                pass
-            return description
-        return ""
+        description = self.getParamInfo(param)["description"]
+        return description if description is not None else ""
 
     def getInputWidget(self, paramMeta, paramType, isRequired):
         """
@@ -376,44 +381,6 @@ class SophysForm(QDialog):
             inputWid.setToolTip(tooltipMsg)
         return inputWid
 
-    def getIsRequired(self, paramMeta, varType):
-        """
-            Get if input is required.
-        """
-        hasDefaultValue = "default" in paramMeta
-        return not (hasDefaultValue or "Optional" in varType)
-
-    def replaceUnknownTypes(self, varType):
-        """
-            Replace bluesky types for python types in order for the
-            type check to work.
-        """
-        for keyType, replaceType in UNKNOWN_TYPES.items():
-            varType = varType.replace(keyType, replaceType)
-        return varType
-
-    def convertTypeToPythonType(self, varType):
-        varType = self.replaceUnknownTypes(varType)
-        return eval(varType) if varType != "" else object
-    
-    def getParamPythonType(self, paramMeta):
-        """
-            Convert a string or an array to a python variable type.
-        """
-        isArgs = "-.-" in paramMeta["description"] if "description" in paramMeta else False
-        if isArgs:
-            motorTyping = getMotorInput(paramMeta).replace("\"", "'").replace("',", "|")
-            motorArray = motorTyping.split(";")
-            motorTypes = motorArray[2].split(",")
-            arrayType = []
-            for strType in motorTypes:
-                strType = strType.replace("|", "',")
-                arrayType.append(self.convertTypeToPythonType(strType))
-            return arrayType
-        hasAnnotation = "annotation" in paramMeta
-        varType = paramMeta["annotation"]["type"] if hasAnnotation else ""
-        return varType
-
     def getInputTitle(self, title, isRequired):
         """
             Create the input title widget.
@@ -425,32 +392,19 @@ class SophysForm(QDialog):
         return lbl
     
     def changeParamTitle(self, title):
-
-        if self.yml_file_path:
-            plan_config = self.config.get(self.chosenItem)
-
-            if plan_config:
-                param_names = plan_config.get("param_names", {})
-                if isinstance(param_names, dict) and any(isinstance(v, dict) for v in param_names.values()):
-                    title_dict = param_names.get(self.group_name)
-                    display_title = title_dict.get(title, title)
-
-                else:
-                    display_title = param_names.get(title, title)
-            else:
-                display_title = title
-        else:
-            display_title = title
-
-        return display_title
+        """
+            Get the parameter display title.
+        """
+        return self.config.getParamTitle(self.chosenItem, title, self.group_name)
 
     def addParameterInput(self, paramMeta, pos, glay):
         """
             Add one parameter input with its title.
         """
 
-        paramType = self.getParamPythonType(paramMeta)
-        isRequired = self.getIsRequired(paramMeta, paramType)
+        paramInfo = self.getParamInfo(paramMeta)
+        paramType = paramInfo["type"]
+        isRequired = paramInfo["required"]
 
         title = paramMeta["name"]
         display_title = self.changeParamTitle(title)
@@ -464,14 +418,11 @@ class SophysForm(QDialog):
         glay.addWidget(inputWid, *pos, rowStretch, 1)
         pos[0] += 1
         
-        pythonType = self.getParamPythonType(paramMeta)
-        if isinstance(pythonType, str):
-            pythonType = self.convertTypeToPythonType(pythonType)
         self.inputWidgets[title] = {
             "widget": inputWid,
             "required": isRequired,
-            "type": pythonType,
-            "kind": paramMeta["kind"]["name"]
+            "type": paramInfo["python_type"],
+            "kind": paramInfo["kind"]
         }
 
         return pos
@@ -512,50 +463,46 @@ class SophysForm(QDialog):
             self.addInputWidget(paramMeta, pos, glay)
 
     def changePlanName(self):
+        """
+            Get the plan display name.
+        """
+        return self.config.getDisplayName(self.chosenItem)
 
-        display_title = self.chosenItem
-
-        if self.yml_file_path:
-            display_title = self.config.get(self.chosenItem, {}).get("name", self.chosenItem)
-        
-        return display_title
-    
     def groupBoxParameters(self, parameters, glay):
+        """
+            Add the parameter inputs in the order and groups of the display configuration.
+        """
+        layout = self.config.getLayout(self.chosenItem)
+        if layout is None:
+            self.addParameters(parameters, glay)
+            return
 
-        plan_config = self.config.get(self.chosenItem)
-
-        if  plan_config:
-            param_names = plan_config.get("param_names", {})
-
-            if isinstance(param_names, dict) and any(isinstance(v, dict) for v in param_names.values()):
-                pos_combo = [0,0]
-                for group_name, group_params in param_names.items():
-                    self.group_name = group_name
-                    groupBox = QGroupBox(self.group_name)
-                    gridLay = QGridLayout()
-                    groupBox.setLayout(gridLay)
-
-                    pos = [0, 0]
-                    for param_key, display_title in group_params.items():
-                        paramMeta = next((p for p in parameters if p["name"] == param_key), None)
-                        if paramMeta:
-                            self.addInputWidget(paramMeta, pos, gridLay)
-
-                    glay.addWidget(groupBox, *pos_combo, 1, 1)
-                    pos_combo[1] += 1
-                    if pos_combo[1] > 2:
-                        pos_combo[0] += 1
-                        pos_combo[1] = 0
-                        
-            else:
+        paramsByName = {paramMeta["name"]: paramMeta for paramMeta in parameters}
+        isGrouped = self.config.isGrouped(self.chosenItem)
+        pos_combo = [0, 0]
+        pos = [0, 0]
+        for group_name, group_params in layout:
+            self.group_name = group_name
+            gridLay = glay
+            if isGrouped:
+                groupBox = QGroupBox(self.group_name)
+                gridLay = QGridLayout()
+                groupBox.setLayout(gridLay)
                 pos = [0, 0]
-                for param_key, display_title in param_names.items():
-                    paramMeta = next((p for p in parameters if p["name"] == param_key), None)
-                    if paramMeta:
-                        self.addInputWidget(paramMeta, pos, glay)
-        else:
-            self.addParameters(parameters, glay)
-        
+
+            for param_key in group_params:
+                paramMeta = paramsByName.get(param_key, None)
+                if paramMeta:
+                    self.addInputWidget(paramMeta, pos, gridLay)
+
+            if isGrouped:
+                glay.addWidget(groupBox, *pos_combo, 1, 1)
+                pos_combo[1] += 1
+                if pos_combo[1] > 2:
+                    pos_combo[0] += 1
+                    pos_combo[1] = 0
+        self.group_name = None
+
     def changeCurrentItem(self, currentItem):
         """
             Update the current plan input parameters.
@@ -591,10 +538,7 @@ class SophysForm(QDialog):
             parameters = itemAllowedParams["parameters"]
             self.inputWidgets = {}
 
-            if self.yml_file_path:
-                self.groupBoxParameters(parameters, glay)
-            else:
-                self.addParameters(parameters, glay)
+            self.groupBoxParameters(parameters, glay)
         else:
             glay.addWidget(self.getNoParametersLabel())
 
@@ -605,17 +549,12 @@ class SophysForm(QDialog):
         self.autosave_metadata.exec()
 
     def comboBoxPlanNames(self, combobox, allowedNames):
-
-        if self.yml_file_path:
-
-            for allowed_name in sorted(allowedNames):
-
-                display_name = self.config.get(allowed_name, {}).get("name", allowed_name)
-                combobox.addItem(display_name, allowed_name)
-        else:
-
-            for allowed_name in sorted(allowedNames):
-                combobox.addItem(allowed_name, allowed_name)
+        """
+            Add the allowed items to the combobox with their display names.
+        """
+        for allowed_name in sorted(allowedNames):
+            display_name = self.config.getDisplayName(allowed_name)
+            combobox.addItem(display_name, allowed_name)
 
     def getGeneralPlanData(self):
         """
@@ -1,8 +0,0 @@
-UNKNOWN_TYPES = {
-    "typing.Sequence": "typing.List",
-    "__READABLE__": "typing.Any",
-    "__DEVICE__": "typing.Any",
-    "__CALLABLE__": "typing.Any",
-    "__MOVABLE__": "typing.Any",
-    "__FLYABLE__": "typing.Any"
-}
@@ -2,51 +2,28 @@ import qtawesome as qta
 from qtpy.QtWidgets import QStackedWidget, QLabel, QPushButton
 
 
-class SophysLed(QStackedWidget):
+class SophysLedBase(QStackedWidget):
     """
-        Led or loading widget that shows the status of the Queue Server.
-
-        Loading mode:
-
-        .. image:: ./_static/load.png
-            :width: 100
-            :alt: Loading Widget
-            :align: center
-
-        Led mode:
-
-        .. image:: ./_static/led.png
-            :width: 100
-            :alt: Led Widget
-            :align: center
-
+        Led or loading widget whose state is updated by updateState
+        every time updateEvent is emitted. By default the event
+        carries whether the led is on.
     """
 
-    def __init__(self, run_engine, statusKey, statusComp, isConn=False, isLoading=False):
+    onColor = ["#00ee00", "#00c700"]
+    offColor = ["#1c6f0d", "#0f3f07"]
+
+    def __init__(self, updateEvent, isLoading=False):
         super().__init__()
-        self.updateEvent = run_engine.events.status_changed
-        self.statusVar = run_engine.re_manager_status
-        self.statusKey = statusKey
-        self.statusComp = statusComp
-        self.isConn = isConn
+        self.updateEvent = updateEvent
         self.isLoading = isLoading
 
-        self.onColor = ["#00ee00", "#00c700"]
-        self.offColor = ["#1c6f0d", "#0f3f07"]
-
         self.setupUi()
 
-    def updateState(self, evt):
+    def updateState(self, isOn):
         """
             Update the led/loading state.
         """
-        if self.isConn:
-            ledStatus = evt.is_connected
-        else:
-            status = self.statusVar
-            statusVal = status.get(self.statusKey, None)
-            ledStatus = self.statusComp(statusVal)
-        self.setCurrentIndex(1 if ledStatus else 0)
+        self.setCurrentIndex(1 if isOn else 0)
 
     def addLoading(self):
         """
@@ -83,3 +60,54 @@ class SophysLed(QStackedWidget):
         self.updateEvent.connect(
             self.updateState)
         self.setFixedSize(20, 20)
+
+
+class SophysLed(SophysLedBase):
+    """
+        Led or loading widget that shows the status of the Queue Server.
+
+        Loading mode:
+
+        .. image:: ./_static/load.png
+            :width: 100
+            :alt: Loading Widget
+            :align: center
+
+        Led mode:
+
+        .. image:: ./_static/led.png
+            :width: 100
+            :alt: Led Widget
+            :align: center
+
+    """
+
+    def __init__(self, run_engine, statusKey, statusComp, isConn=False, isLoading=False):
+        super().__init__(run_engine.events.status_changed, isLoading)
+        self.statusVar = run_engine.re_manager_status
+        self.statusKey = statusKey
+        self.statusComp = statusComp
+        self.isConn = isConn
+
+    def updateState(self, evt):
+        """
+            Update the led/loading state.
+        """
+        if self.isConn:
+            ledStatus = evt.is_connected
+        else:
+            status = self.statusVar
+            statusVal = status.get(self.statusKey, None)
+            ledStatus = self.statusComp(statusVal)
+        self.setCurrentIndex(1 if ledStatus else 0)
+
+
+class SophysConnectionLed(SophysLedBase):
+    """
+        Led that shows the state of a connection reported by a Qt signal,
+        such as the connection to Kafka.
+    """
+
+    def __init__(self, connectionChanged, isConnected=False):
+        super().__init__(connectionChanged)
+        self.updateState(isConnected)
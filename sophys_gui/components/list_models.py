@@ -1,20 +1,25 @@
-import copy
-import re
 import yaml
+import json
+from collections import OrderedDict
 from datetime import datetime
 from qtpy.QtCore import Qt, QAbstractTableModel, QModelIndex, Slot, \
-    Signal
+    Signal, QSortFilterProxyModel, QMimeData, QTimer
 from qtpy.QtGui import QBrush, QColor
 from qtpy.QtWidgets import QMainWindow, QLabel, QScrollArea, QApplication, QWidget, \
     QVBoxLayout, QHBoxLayout
-from sophys_gui.functions import getItemRecursively, addArgsToKwargs, addLineJumps, openYaml
+from sophys_gui.functions import getItemRecursively, addArgsToKwargs, addLineJumps, \
+    getContiguousBlocks, getStableKeys, showCommandError
 from .form import SophysForm
+from .config import SophysDisplayConfig
 
 class ListModel(QAbstractTableModel):
     update_visible = True
     SelectedRole = Qt.UserRole + 1
     _roles = {Qt.DisplayRole: b"value", Qt.ToolTipRole: b"tooltip", SelectedRole: b"selected"}
     updateTable = Signal([int])
+    planListChanged = Signal(object)
+    tooltip_cache_size = 512
+    _brushes = {}
 
     def statusRender(self, item: dict, status: str):
         """Renders the 'Status' column items."""
@@ -29,24 +34,7 @@ class ListModel(QAbstractTableModel):
         return str(user[0])
     
     def changeParametersName(self, key, plan_name):
-
-        plan_configuration = self.config.get(plan_name, {})
-        parameters_dict = plan_configuration.get("param_names", {})
-
-        kwargs_dict = dict()
-
-        if isinstance(parameters_dict, dict):
-
-            for value in parameters_dict.values():
-
-                if isinstance(value, dict):
-                    kwargs_dict.update(value)
-            
-                else:
-                    kwargs_dict.update(parameters_dict)
-                    break
-
-        return kwargs_dict.get(key, key)
+        return self.config.getParamTitle(plan_name, key)
 
     def argumentsRender(self, item: dict, argsList: dict):
         """Renders the 'Arguments' column items."""
@@ -55,18 +43,13 @@ class ListModel(QAbstractTableModel):
         if not (hasArgs or hasKwargs):
             return "None"
         desc = []
-        if not hasKwargs or argsList[1] == '':
-            argsList[1] = {}
+        kwargs = argsList[1] if hasKwargs and argsList[1] != '' else {}
         if hasArgs:
-            addArgsToKwargs(argsList)
+            kwargs = addArgsToKwargs([argsList[0], kwargs])
         if item["item_type"] == "plan":
             plan_name = item['name']
-            for key, val in argsList[1].items():
-
-                new_key = key
-                if self.yml_file_path:
-                    new_key = self.changeParametersName(key, plan_name)
-
+            for key, val in kwargs.items():
+                new_key = self.changeParametersName(key, plan_name)
                 desc.append("{} = {}".format(new_key, val))
             return "\n".join(desc)
         return str(desc)
@@ -88,7 +71,7 @@ class ListModel(QAbstractTableModel):
     def nameTooltipRender(self, item: dict, name: str):
         """Renders the 'Name' column item tooltips."""
         if item["item_type"] == "plan":
-            info = self._re_model.run_engine.get_allowed_plan_parameters(name=name)
+            info = self._re_model.catalog.getItem("plan", name) or {}
             if "description" in info:
                 description = info["description"]
 
@@ -110,33 +93,20 @@ class ListModel(QAbstractTableModel):
         if not (hasArgs or hasKwargs):
             return "None"
         desc = []
+        kwargs = argsList[1] if hasKwargs and argsList[1] != '' else {}
         if hasArgs:
-            addArgsToKwargs(argsList)
+            kwargs = addArgsToKwargs([argsList[0], kwargs])
         if item["item_type"] == "plan":
             plan_name = item['name']
-            params = self._re_model.run_engine.get_allowed_plan_parameters(name=item["name"])["parameters"]
-            for key in argsList[1]:
-                matches = list(filter(lambda x: x["name"] == key, params))
-                if len(matches) == 0:
+            params = self._re_model.catalog.getParameters("plan", plan_name)
+            for key in kwargs:
+                param = params.get(key, None)
+                if param is None:
                     continue
 
-                param = matches[0]
-
-                if "description" in param:
-                    description = param["description"]
-                    try:
-                        extraIdx = description.index("-.-")
-                        description = description[:extraIdx]
-                    except Exception:
-                        pass
-                    description = re.sub("\n+", ". ", description)
-
-                    if self.yml_file_path:
-                        new_key = self.changeParametersName(key, plan_name)
-                    else:
-                        new_key = key
-
-                    tooltipRow = "{}: {}".format(new_key, description)
+                if param["tooltip"] is not None:
+                    new_key = self.changeParametersName(key, plan_name)
+                    tooltipRow = "{}: {}".format(new_key, param["tooltip"])
                 else:
                     tooltipRow = ""
                 desc.append(addLineJumps(tooltipRow))
@@ -167,9 +137,22 @@ class ListModel(QAbstractTableModel):
         self.plan_items = plan_items
         self.row_count = row_count
         self.yml_file_path = yml_file_path
-        self.config = openYaml(self.yml_file_path)
-        plan_changed.connect(self.onPlanListChanged)
-        self.selected_rows = []
+        self.displayConfig = SophysDisplayConfig.fromPath(self.yml_file_path)
+        self.config = self.displayConfig.snapshot
+        self.displayConfig.configChanged.connect(self.onDisplayConfigChanged)
+        self._render_cache = {}
+        self._tooltip_cache = OrderedDict()
+        self._search_keys = {}
+        self._revision = self.getRevision()
+        self._items = self.getViewItems(self.plan_items)
+        self._item_rows = None
+        self._unique_keys = self.hasUniqueKeys(
+            [self.getItemKey(item) for item in self._items])
+        self.indexSearchKeys(self._items)
+        self.selected_items = []
+        self.actions_enabled = False
+        self.planListChanged.connect(self.onPlanListChanged)
+        plan_changed.connect(self.emitPlanListChanged)
         isHistory = listId == "History"
         if isHistory:
             self.columns = self.columns_history
@@ -182,7 +165,7 @@ class ListModel(QAbstractTableModel):
     def rowCount(self, parent=QModelIndex()):
         if parent.isValid():
             return 0
-        rows = len(self.plan_items)
+        rows = len(self._items)
         if self.update_visible:
             self.visible_rows = (0, rows)
         return rows
@@ -192,41 +175,215 @@ class ListModel(QAbstractTableModel):
             return 0
         return len(self.columns)
 
-    def getBackgroundColor(self, row):
-        if row in self.selected_rows:
+    def getBackgroundColor(self, row, stripe_row=None):
+        if self.getItemKey(self._items[row]) in self.selected_items:
             return "gray"
-        if row%2 == 0:
+        stripe_row = row if stripe_row is None else stripe_row
+        if stripe_row%2 == 0:
             return "#dfdfdf"
         return "#f7f7f7"
 
+    def getBackgroundBrush(self, row, stripe_row=None):
+        """
+            Get the row brush, creating each color brush only once.
+        """
+        color = self.getBackgroundColor(row, stripe_row)
+        if color not in self._brushes:
+            self._brushes[color] = QBrush(QColor(color))
+        return self._brushes[color]
+
+    def getRevision(self):
+        """
+            Get the server revision of the list shown in this model.
+        """
+        return ""
+
+    def getViewItems(self, items):
+        """
+            Get the items in the order they are shown in the table.
+        """
+        return list(items)
+
+    def getItemKey(self, item):
+        """
+            Get the key that identifies an item in the table.
+        """
+        return item.get("item_uid", None)
+
+    def hasUniqueKeys(self, keys):
+        """
+            Check if the keys can identify each item of the list.
+        """
+        return None not in keys and len(set(keys)) == len(keys)
+
+    def getCacheKey(self, item):
+        """
+            Get the key of an item in the render caches, or None if it can't be
+            cached because the list has items without a key or with the same key.
+        """
+        if not self._unique_keys:
+            return None
+        return self.getItemKey(item)
+
+    def getItem(self, row):
+        """
+            Get the item shown in a table row.
+        """
+        return self._items[row]
+
+    def getItemRow(self, item_key):
+        """
+            Get the table row of an item key, or -1 if it is not in the table.
+        """
+        if self._item_rows is None:
+            self._item_rows = {
+                self.getItemKey(item): row for row, item in enumerate(self._items)}
+        return self._item_rows.get(item_key, -1)
+
+    def clearRenderCache(self, unchanged_keys=()):
+        """
+            Evict the cached renders of the items that changed or left the
+            list, carrying over the others to the current list revision.
+            Renders made while the rows were changing are evicted too.
+        """
+        self._render_cache = {
+            (key, self._revision): value
+            for (key, revision), value in self._render_cache.items()
+            if key in unchanged_keys}
+
+    def clearTooltipCache(self, unchanged_keys=()):
+        """
+            Evict the cached tooltips of the items that changed or left the list.
+        """
+        for cache_key in list(self._tooltip_cache.keys()):
+            if cache_key[0] not in unchanged_keys:
+                del self._tooltip_cache[cache_key]
+
+    def renderSearchKey(self, item):
+        """
+            Build the lower-cased (text, status, user) search key of an item,
+            with its name, display name, user, exit status and arguments.
+        """
+        name = str(item.get("name", ""))
+        user = str(item.get("user", ""))
+        status = str(getItemRecursively(item, ["result", "exit_status"]))
+        arguments = self.argumentsRender(item, getItemRecursively(item, [["args", "kwargs"]]))
+        text = "\n".join([
+            name, str(self.config.getDisplayName(name)), user, status, str(arguments)])
+        return (text.lower(), status.lower(), user.lower())
+
+    def getSearchKey(self, item):
+        """
+            Get the search key of an item, building it only once per item.
+        """
+        item_key = self.getCacheKey(item)
+        if item_key is None:
+            return self.renderSearchKey(item)
+        if item_key not in self._search_keys:
+            self._search_keys[item_key] = self.renderSearchKey(item)
+        return self._search_keys[item_key]
+
+    def getSearchKeyAt(self, row):
+        """
+            Get the search key of the item shown in a table row.
+        """
+        return self.getSearchKey(self._items[row])
+
+    def indexSearchKeys(self, items):
+        """
+            Build the search keys of the items that arrived in the table.
+        """
+        for item in items:
+            self.getSearchKey(item)
+
+    def clearSearchKeys(self, unchanged_keys=()):
+        """
+            Evict the search keys of the items that changed or left the list.
+        """
+        self._search_keys = {
+            key: value for key, value in self._search_keys.items()
+            if key in unchanged_keys}
+
+    def onDisplayConfigChanged(self, snapshot):
+        """
+            Render all the cells again with the new display configuration.
+        """
+        self.config = snapshot
+        self._render_cache = {}
+        self._tooltip_cache.clear()
+        self._search_keys = {}
+        self.indexSearchKeys(self._items)
+        rows = len(self._items)
+        if rows > 0:
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(rows - 1, len(self.columns) - 1))
+
+    def renderCell(self, item, column, role):
+        """
+            Compute the display or tooltip value of a cell.
+        """
+        column_spec = self.columns[column]
+        if role == Qt.DisplayRole:
+            name = getItemRecursively(item, column_spec[1])
+            new_name = self.config.getDisplayName(name) if isinstance(name, str) else name
+            return column_spec[2](self, item, new_name)
+        if column_spec[3] is None:
+            return
+        return column_spec[3](self, item, getItemRecursively(item, column_spec[1]))
+
+    def getCachedCell(self, item, column, role):
+        """
+            Get the cell value from the render cache, computing it only
+            on the first request for each item of the list revision.
+        """
+        item_key = self.getCacheKey(item)
+        if item_key is None:
+            return self.renderCell(item, column, role)
+        cache_key = (item_key, self._revision)
+        item_cache = self._render_cache.setdefault(cache_key, {})
+        cell_key = (column, role)
+        if cell_key not in item_cache:
+            item_cache[cell_key] = self.renderCell(item, column, role)
+        return item_cache[cell_key]
+
+    def getCachedTooltip(self, item, column):
+        """
+            Get the cell tooltip, computing it only on the first hover over
+            the item and keeping the most recently used ones.
+        """
+        item_key = self.getCacheKey(item)
+        if item_key is None:
+            return self.renderCell(item, column, Qt.ToolTipRole)
+        cache_key = (item_key, column)
+        version = self._re_model.catalog.getVersion()
+        cached = self._tooltip_cache.get(cache_key, None)
+        if cached is not None and cached[0] == version:
+            self._tooltip_cache.move_to_end(cache_key)
+            return cached[1]
+        tooltip = self.renderCell(item, column, Qt.ToolTipRole)
+        self._tooltip_cache[cache_key] = (version, tooltip)
+        self._tooltip_cache.move_to_end(cache_key)
+        if len(self._tooltip_cache) > self.tooltip_cache_size:
+            self._tooltip_cache.popitem(last=False)
+        return tooltip
+
     def data(self, index, role=Qt.DisplayRole):
         if not index.isValid():
             return
-        row = self.row_count(index.row()) - 1
+        row = index.row()
         if row <= self.visible_rows[1] and row >= self.visible_rows[0]:
             try:
-                item = copy.deepcopy(self.plan_items[row])
+                item = self._items[row]
             except IndexError:
                 return
-            column_spec = self.columns[index.column()]
             if role == Qt.BackgroundRole:
-                return QBrush(QColor(self.getBackgroundColor(row)))
+                return self.getBackgroundBrush(row)
             if role == Qt.DisplayRole:
-                name = getItemRecursively(item, column_spec[1])
-                      
-                if self.yml_file_path:
-                    new_name = self.config.get(str(name), {}).get("name", name)
-
-                else:
-                    new_name = name
-
-                return column_spec[2](self, item, new_name)
+                return self.getCachedCell(item, index.column(), role)
             if role == Qt.ToolTipRole:
-                if column_spec[3] is None:
-                    return
-                return column_spec[3](self, item, getItemRecursively(item, column_spec[1]))
+                return self.getCachedTooltip(item, index.column())
             if role == self.SelectedRole:
-                return index.row() in self.selected_rows
+                return self.getItemKey(item) in self.selected_items
 
     def headerData(self, section, orientation, role):
         if role == Qt.DisplayRole:
@@ -245,38 +402,329 @@ class ListModel(QAbstractTableModel):
     def roleNames(self):
         return self._roles
 
+    def getActionsEnabled(self):
+        """
+            Get if the row actions can be used.
+        """
+        return self.actions_enabled
+
+    def setActionsEnabled(self, enabled):
+        self.actions_enabled = enabled
+
     def getSelectedRows(self):
-        return self.selected_rows
+        """
+            Get the table rows of the selected items, in table order.
+        """
+        rows = [self.getItemRow(key) for key in self.selected_items]
+        return sorted(row for row in rows if row >= 0)
+
+    def emitRowsChanged(self, rows):
+        """
+            Repaint only the given rows.
+        """
+        for first, last in getContiguousBlocks(rows):
+            self.dataChanged.emit(
+                self.index(first, 0),
+                self.index(last, self.columnCount() - 1))
 
-    @Slot(object)
-    def onPlanListChanged(self, _):
+    def setSelectedRows(self, rows):
+        """
+            Select the items shown in the given rows.
+        """
+        changed_rows = [*self.getSelectedRows(), *rows]
+        self.selected_items = [self.getItemKey(self._items[row]) for row in rows]
+        self.emitRowsChanged(changed_rows)
+
+    @Slot(int)
+    def select(self, row):
+        self.setSelectedRows([row])
+
+    def emitPlanListChanged(self, _):
+        """
+            Forward the Run Engine list update to the thread that owns the model,
+            with a snapshot of the items and of their revision.
+        """
+        self.planListChanged.emit((list(self.plan_items), self.getRevision()))
+
+    def resetItems(self, newItems):
+        """
+            Replace all the items, throwing away the table state.
+        """
         self.beginResetModel()
+        self._items = newItems
+        self._item_rows = None
         self.endResetModel()
+
+    def removeItems(self, oldKeys, newKeys):
+        """
+            Remove the rows of the items that are not in the new list.
+        """
+        newKeySet = set(newKeys)
+        removed = [row for row, key in enumerate(oldKeys) if key not in newKeySet]
+        for first, last in reversed(getContiguousBlocks(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._items[first:last + 1]
+            del oldKeys[first:last + 1]
+            self.endRemoveRows()
+
+    def moveItems(self, oldKeys, newKeys):
+        """
+            Move the rows of the items that changed their relative order.
+        """
+        oldKeySet = set(oldKeys)
+        targetKeys = [key for key in newKeys if key in oldKeySet]
+        stableKeys = getStableKeys(oldKeys, targetKeys)
+        previous = None
+        for key in targetKeys:
+            if key not in stableKeys:
+                source = oldKeys.index(key)
+                destination = oldKeys.index(previous) + 1 if previous is not None else 0
+                if destination not in (source, source + 1):
+                    self.beginMoveRows(
+                        QModelIndex(), source, source, QModelIndex(), destination)
+                    final = destination if destination < source else destination - 1
+                    oldKeys.insert(final, oldKeys.pop(source))
+                    self._items.insert(final, self._items.pop(source))
+                    self.endMoveRows()
+            previous = key
+
+    def insertItems(self, oldKeys, newKeys, newItems):
+        """
+            Insert the rows of the items that are not in the table yet.
+        """
+        oldKeySet = set(oldKeys)
+        inserted = [row for row, key in enumerate(newKeys) if key not in oldKeySet]
+        for first, last in getContiguousBlocks(inserted):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._items[first:first] = newItems[first:last + 1]
+            oldKeys[first:first] = newKeys[first:last + 1]
+            self.endInsertRows()
+
+    def updateItems(self, newItems, newKeys):
+        """
+            Apply the difference between the current and the new items as
+            row removals, moves, insertions and data changes.
+        """
+        oldKeys = [self.getItemKey(item) for item in self._items]
+        self.removeItems(oldKeys, newKeys)
+        self.moveItems(oldKeys, newKeys)
+        self.insertItems(oldKeys, newKeys, newItems)
+        self._item_rows = None
+
+        changed_rows = []
+        unchanged_keys = set()
+        for row, newItem in enumerate(newItems):
+            oldItem = self._items[row]
+            if oldItem is newItem or oldItem == newItem:
+                unchanged_keys.add(newKeys[row])
+            else:
+                changed_rows.append(row)
+            self._items[row] = newItem
+        return changed_rows, unchanged_keys
+
+    @Slot(object)
+    def onPlanListChanged(self, planList):
+        items, revision = planList
+        newItems = self.getViewItems(items)
+        newKeys = [self.getItemKey(item) for item in newItems]
+        canUpdate = self._unique_keys and self.hasUniqueKeys(newKeys)
+        self._unique_keys = self.hasUniqueKeys(newKeys)
+        self._revision = revision
+        if canUpdate:
+            changed_rows, unchanged_keys = self.updateItems(newItems, newKeys)
+            self.clearRenderCache(unchanged_keys)
+            self.clearTooltipCache(unchanged_keys)
+            self.clearSearchKeys(unchanged_keys)
+            self.indexSearchKeys(self._items)
+            self.emitRowsChanged(changed_rows)
+        else:
+            self.clearRenderCache()
+            self.clearTooltipCache()
+            self.clearSearchKeys()
+            self.indexSearchKeys(newItems)
+            self.resetItems(newItems)
         self.updateTable.emit(self.rowCount())
 
 
+class ListFilterModel(QSortFilterProxyModel):
+    """
+        Filter of the queue or history items by text, exit status or user,
+        matched against the search keys kept by the list model.
+    """
+
+    def __init__(self, source_model, parent=None):
+        super().__init__(parent)
+        self.filter_text = ""
+        self.filter_status = ""
+        self.filter_user = ""
+        self.setSourceModel(source_model)
+
+    def setFilterText(self, text):
+        self.filter_text = text.strip().lower()
+        self.invalidate()
+
+    def setStatusFilter(self, status):
+        self.filter_status = (status or "").lower()
+        self.invalidate()
+
+    def setUserFilter(self, user):
+        self.filter_user = (user or "").strip().lower()
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not (self.filter_text or self.filter_status or self.filter_user):
+            return True
+        text, status, user = self.sourceModel().getSearchKeyAt(source_row)
+        if self.filter_status and status != self.filter_status:
+            return False
+        if self.filter_user and self.filter_user not in user:
+            return False
+        return self.filter_text in text
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.BackgroundRole and index.isValid():
+            source_row = self.mapToSource(index).row()
+            return self.sourceModel().getBackgroundBrush(source_row, index.row())
+        return super().data(index, role)
+
+    def getSourceRow(self, row):
+        """
+            Get the list model row of a filtered table row.
+        """
+        return self.mapToSource(self.index(row, 0)).row()
+
+    def getSourceRows(self, first, last):
+        """
+            Get the list model rows shown between two filtered table rows.
+        """
+        last = min(last, self.rowCount() - 1)
+        if last < max(first, 0):
+            return (0, -1)
+        return (self.getSourceRow(max(first, 0)), self.getSourceRow(last))
+
+    def getColumns(self):
+        return self.sourceModel().getColumns()
+
+    def getActionsEnabled(self):
+        return self.sourceModel().getActionsEnabled()
+
+    def setActionsEnabled(self, enabled):
+        self.sourceModel().setActionsEnabled(enabled)
+
+    def getSelectedRows(self):
+        """
+            Get the filtered table rows of the selected items.
+        """
+        model = self.sourceModel()
+        rows = [
+            self.mapFromSource(model.index(row, 0)).row()
+            for row in model.getSelectedRows()]
+        return sorted(row for row in rows if row >= 0)
+
+    def setSelectedRows(self, rows):
+        """
+            Select the items shown in the given filtered table rows.
+        """
+        self.sourceModel().setSelectedRows(
+            [self.getSourceRow(row) for row in rows])
+
+    @Slot(int)
+    def select(self, row):
+        self.sourceModel().select(self.getSourceRow(row))
+
+
 class HistoryModel(ListModel):
+    page_size = 100
 
     def __init__(self, re_model, yml_file_path=None, parent=None):
         history_changed = re_model.run_engine.events.plan_history_changed
         history_items = re_model.run_engine._plan_history_items
         self.yml_file_path = yml_file_path
-        row_count = lambda section: self.rowCount()-section
+        row_count = lambda section: self.getTotalCount()-section
         self.update_visible = False
         self.visible_rows = (0, 0)
+        self._history = list(history_items)
+        self._fetched = self.page_size
+        self._changing_rows = False
         super().__init__(re_model, history_changed, history_items, row_count, "History", self.yml_file_path, parent)
 
-    @Slot(int)
-    def select(self, row):
-        changed_rows = [*self.selected_rows, row]
-        self.selected_rows = [self.rowCount() - row - 1]
-        for changed_row in changed_rows:
-            self.dataChanged.emit(
-                self.index(changed_row, 0),
-                self.index(changed_row, self.columnCount() - 1))
+    def getRevision(self):
+        return self._re_model.run_engine._plan_history_uid
+
+    def getItemKey(self, item):
+        """
+            History items are keyed by their uid and start time,
+            since a looped queue item can run more than once.
+        """
+        result = item.get("result", {})
+        return (item.get("item_uid", None), result.get("time_start", None))
+
+    def getViewItems(self, items):
+        """
+            The most recent history items are shown first and only
+            the fetched pages are kept in the table.
+        """
+        start = max(len(items) - self._fetched, 0)
+        return list(reversed(items[start:]))
+
+    def getTotalCount(self):
+        """
+            Get the number of items in the server history.
+        """
+        return len(self._history)
+
+    def getResidentCount(self):
+        """
+            Get the number of history items loaded in the table.
+        """
+        return len(self._items)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._changing_rows:
+            return False
+        return self.getResidentCount() < self.getTotalCount()
+
+    def fetchMore(self, parent=QModelIndex()):
+        """
+            Load the next page of older history items.
+        """
+        if parent.isValid() or self._changing_rows:
+            return
+        first = self.getResidentCount()
+        end = self.getTotalCount() - first
+        count = min(self.page_size, end)
+        if count <= 0:
+            return
+        self._changing_rows = True
+        olderItems = list(reversed(self._history[end - count:end]))
+        self.indexSearchKeys(olderItems)
+        self.beginInsertRows(QModelIndex(), first, first + count - 1)
+        self._items.extend(olderItems)
+        self._item_rows = None
+        self._fetched = first + count
+        self.endInsertRows()
+        self._changing_rows = False
+
+    @Slot(object)
+    def onPlanListChanged(self, planList):
+        self._history = planList[0]
+        if len(self._history) == 0:
+            self._fetched = self.page_size
+        self._changing_rows = True
+        try:
+            super().onPlanListChanged(planList)
+        finally:
+            self._changing_rows = False
+
+    def getSelectedPositions(self):
+        """
+            Get the history positions of the selected items.
+        """
+        total = self.getTotalCount()
+        return sorted(total - row - 1 for row in self.getSelectedRows())
 
     def setSelectedItems(self):
-        self._re_model.run_engine.selected_history_item_pos = self.selected_rows
+        self._re_model.run_engine.selected_history_item_pos = self.getSelectedPositions()
 
     @Slot()
     def clear_all(self):
@@ -316,8 +764,8 @@ class HistoryModel(ListModel):
     def error_log(self):
         selected_row = self.getSelectedRows()
         if len(selected_row) > 0:
-            selected_item = self._re_model.run_engine._plan_history_items[selected_row[0]]
-            row_id = selected_row[0]+1
+            selected_item = self.getItem(selected_row[0])
+            row_id = self.row_count(selected_row[0])
             if selected_item["result"]["exit_status"] == "failed":
                 self.window = QMainWindow()
                 self.window.setWindowTitle(f"Error log of the run number {row_id}")
@@ -331,6 +779,9 @@ class HistoryModel(ListModel):
 
 
 class QueueModel(ListModel):
+    mime_type = "application/x-sophys-queue-item-uids"
+    # Time in ms without new moves of the same items before they are sent to the server
+    move_debounce = 300
 
     def __init__(self, re_model, reading_order, yml_file_path=None, parent=None):
         queue_changed = re_model.run_engine.events.plan_queue_changed
@@ -340,73 +791,241 @@ class QueueModel(ListModel):
         self.global_metadata = {}
         self.reading_order = reading_order
         super().__init__(re_model, queue_changed, queue_items, row_count, "Queue", self.yml_file_path, parent)
+        self._pending_move = None
+        self.moveTimer = QTimer(self)
+        self.moveTimer.setSingleShot(True)
+        self.moveTimer.setInterval(self.move_debounce)
+        self.moveTimer.timeout.connect(self.flushMove)
 
-    @Slot(int)
-    def select(self, row):
-        changed_rows = [*self.selected_rows, row]
-        self.selected_rows = [row]
-        for changed_row in changed_rows:
-            self.dataChanged.emit(
-                self.index(changed_row, 0),
-                self.index(changed_row, self.columnCount() - 1))
+    def getRevision(self):
+        return self._re_model.run_engine._plan_queue_uid
+
+    def flags(self, index):
+        if not self.actions_enabled:
+            return super().flags(index)
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return super().flags(index) | Qt.ItemIsDragEnabled
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    def mimeTypes(self):
+        return [self.mime_type]
+
+    def mimeData(self, indexes):
+        """
+            Pack the UIDs of the dragged rows, in queue order.
+        """
+        rows = sorted(set(index.row() for index in indexes))
+        uids = [self.getItemKey(self._items[row]) for row in rows]
+        data = QMimeData()
+        data.setData(self.mime_type, json.dumps(uids).encode())
+        return data
+
+    def getDropReference(self, uids, row, parent):
+        """
+            Get the reference item UID and the position ("before" or "after")
+            for moving the dragged items to a table row.
+        """
+        if row < 0 and parent.isValid():
+            row = parent.row()
+            firstRow = self.getItemRow(uids[0])
+            if row > firstRow:
+                row += 1
+        if row < 0 or row > len(self._items):
+            row = len(self._items)
+        keys = [self.getItemKey(item) for item in self._items]
+        after = [key for key in keys[row:] if key not in uids]
+        if after:
+            return after[0], "before"
+        before = [key for key in keys[:row] if key not in uids]
+        if before:
+            return before[-1], "after"
+        return None, None
+
+    def dropMimeData(self, data, action, row, column, parent):
+        """
+            Move the dropped items locally and send a single move
+            request to the server.
+        """
+        if action != Qt.MoveAction or not data.hasFormat(self.mime_type):
+            return False
+        uids = json.loads(bytes(data.data(self.mime_type)).decode())
+        uids = [uid for uid in uids if self.getItemRow(uid) >= 0]
+        if not uids:
+            return False
+        ref_uid, position = self.getDropReference(uids, row, parent)
+        if ref_uid is None:
+            return False
+        self.move_items_to(uids, ref_uid, position)
+        return True
+
+    def runCommand(self, description, command, *args, newItems=None, **kwargs):
+        """
+            Send a queue command to the server without blocking the GUI. If newItems
+            is given it is shown right away as the expected queue, and the server
+            queue is shown again if the command fails.
+        """
+        self.flushMove()
+        if newItems is not None:
+            self.onPlanListChanged((newItems, self._revision))
+        return self.sendCommand(
+            description, command, *args, isOptimistic=newItems is not None, **kwargs)
+
+    def sendCommand(self, description, command, *args, isOptimistic=False, **kwargs):
+        return self._re_model.submitCommand(
+            command, *args, **kwargs,
+            onDone=lambda future: self.onCommandDone(description, future, isOptimistic))
+
+    def onCommandDone(self, description, future, isOptimistic):
+        """
+            Roll back the expected queue and show a popup if the command failed.
+        """
+        error = future.exception()
+        if error is None:
+            return
+        if isOptimistic:
+            self.emitPlanListChanged(None)
+        showCommandError(description, error)
+
+    def getMovedItems(self, items, uids, ref_uid, position):
+        """
+            Get the items in the order expected after moving them before
+            or after the reference item, or None if any of them is missing.
+        """
+        uidSet = set(uids)
+        byKey = {self.getItemKey(item): item for item in items}
+        if ref_uid in uidSet or ref_uid not in byKey or any(uid not in byKey for uid in uids):
+            return None
+        others = [item for item in items if self.getItemKey(item) not in uidSet]
+        keys = [self.getItemKey(item) for item in others]
+        refPos = keys.index(ref_uid) + (1 if position == "after" else 0)
+        others[refPos:refPos] = [byKey[uid] for uid in uids]
+        return others
+
+    @Slot(object)
+    def onPlanListChanged(self, planList):
+        """
+            Show the queue with the pending move applied, so a reload received
+            before the move is sent doesn't undo it. The move is dropped if its
+            items or its reference item left the queue.
+        """
+        items, revision = planList
+        if self._pending_move is not None:
+            movedItems = self.getMovedItems(items, *self._pending_move)
+            if movedItems is None:
+                self.moveTimer.stop()
+                self._pending_move = None
+            else:
+                items = movedItems
+        super().onPlanListChanged((items, revision))
+
+    def move_items_to(self, uids, ref_uid, position):
+        """
+            Move the items before or after the reference item in the table. Consecutive
+            moves of the same items are sent to the server as a single request.
+        """
+        if not uids or ref_uid is None or ref_uid in uids:
+            return
+        if self._pending_move is None or self._pending_move[0] != uids:
+            self.flushMove()
+        self._pending_move = (list(uids), ref_uid, position)
+        self.onPlanListChanged((self._items, self._revision))
+        self.moveTimer.start()
+
+    @Slot()
+    def flushMove(self):
+        """
+            Send the pending move to the server, with the reference item and
+            position it was made with.
+        """
+        self.moveTimer.stop()
+        if self._pending_move is None:
+            return
+        (uids, ref_uid, position), self._pending_move = self._pending_move, None
+        self.sendCommand(
+            "move the items", self._re_model.run_engine._queue_items_move,
+            isOptimistic=True, sel_items=uids, ref_item=ref_uid, position=position)
+
+    def getSelectedKeys(self):
+        return [self.getItemKey(self._items[row]) for row in self.getSelectedRows()]
 
     def setSelectedItems(self):
-        self._re_model.run_engine.selected_queue_item_uids = [
-            self._re_model.run_engine.queue_item_pos_to_uid(i) for i in self.selected_rows]
+        self._re_model.run_engine.selected_queue_item_uids = self.getSelectedKeys()
+
+    def getUnselectedKeys(self, uids):
+        uidSet = set(uids)
+        return [self.getItemKey(item) for item in self._items
+                if self.getItemKey(item) not in uidSet]
 
     @Slot()
     def move_up(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_items_move_up()
-        self.selected_rows = [i - 1 for i in self.selected_rows]
-        for changed_row in self.selected_rows:
-            self.dataChanged.emit(
-                self.index(changed_row, 0),
-                self.index(changed_row + 1, self.columnCount() - 1))
+        uids = self.getSelectedKeys()
+        row = self.getItemRow(uids[0]) if uids else -1
+        if row > 0:
+            self.move_items_to(uids, self.getItemKey(self._items[row - 1]), "before")
 
     @Slot()
     def move_down(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_items_move_down()
-        self.selected_rows = [i + 1 for i in self.selected_rows]
-        for changed_row in self.selected_rows:
-            self.dataChanged.emit(
-                self.index(changed_row - 1, 0),
-                self.index(changed_row, self.columnCount() - 1))
+        uids = self.getSelectedKeys()
+        row = self.getItemRow(uids[-1]) if uids else len(self._items)
+        if row < len(self._items) - 1:
+            self.move_items_to(uids, self.getItemKey(self._items[row + 1]), "after")
 
     @Slot()
     def move_top(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_items_move_to_top()
-        __last_modified_row = max(self.selected_rows)
-        self.selected_rows = [i for i in range(len(self.selected_rows))]
-        self.dataChanged.emit(
-            self.index(0, 0),
-            self.index(__last_modified_row, self.columnCount() - 1))
+        uids = self.getSelectedKeys()
+        others = self.getUnselectedKeys(uids)
+        if others:
+            self.move_items_to(uids, others[0], "before")
 
     @Slot()
     def move_bottom(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_items_move_to_bottom()
-        __last_modified_row = min(self.selected_rows)
-        self.selected_rows = [self.rowCount() - i - 1 for i in range(len(self.selected_rows))]
-        self.dataChanged.emit(
-            self.index(__last_modified_row, 0),
-            self.index(self.rowCount() - 1, self.columnCount() - 1))
+        uids = self.getSelectedKeys()
+        others = self.getUnselectedKeys(uids)
+        if others:
+            self.move_items_to(uids, others[-1], "after")
 
     @Slot()
     def clear_all(self):
-        self._re_model.run_engine.queue_clear()
+        self.runCommand(
+            "clear the queue", self._re_model.run_engine.queue_clear, newItems=[])
+
+    def remove_items(self, uids):
+        """
+            Remove a batch of items from the server queue.
+        """
+        try:
+            self._re_model.run_engine._client.item_remove_batch(uids=uids)
+        finally:
+            self._re_model.requestRefresh()
 
     @Slot()
     def delete_item(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_items_remove()
+        uids = self.getSelectedKeys()
+        if not uids:
+            return
+        uidSet = set(uids)
+        self.runCommand(
+            "delete the items", self.remove_items, uids,
+            newItems=[item for item in self._items if self.getItemKey(item) not in uidSet])
 
     @Slot()
     def duplicate_item(self):
-        self.setSelectedItems()
-        self._re_model.run_engine.queue_item_copy_to_queue()
+        """
+            Add copies of the selected items after them. Unlike the other queue
+            commands the copies are not shown before the server answers, since
+            their item UIDs are given by the server and rows without an UID
+            couldn't be selected, moved or deleted in the meantime.
+        """
+        uids = self.getSelectedKeys()
+        if not uids:
+            return
+        items = [self._items[self.getItemRow(uid)] for uid in uids]
+        self.runCommand(
+            "duplicate the items", self._re_model.run_engine.queue_item_add_batch,
+            items=items, params={"after_uid": uids[-1]})
 
     def get_item_type(self):
         re = self._re_model.run_engine
@@ -415,13 +1034,9 @@ class QueueModel(ListModel):
         return re._plan_queue_items[pos]['item_type']
 
     def get_name_param_variables(self, item_type):
-        re = self._re_model.run_engine
-        if item_type == 'plan':
-            allowed_parameters = re.get_allowed_plan_parameters
-            allowed_names = re.get_allowed_plan_names
-        else:
-            allowed_parameters = re.get_allowed_instruction_parameters
-            allowed_names = re.get_allowed_instruction_names
+        catalog = self._re_model.catalog
+        allowed_parameters = catalog.getAllowedParameters(item_type)
+        allowed_names = catalog.getAllowedNames(item_type)
         return allowed_parameters, allowed_names
 
     def has_open_environment(self):
@@ -438,21 +1053,21 @@ class QueueModel(ListModel):
         allowed_parameters, allowed_names = self.get_name_param_variables("plan")
         SophysForm(self._re_model.run_engine, "add_plan",
             allowed_parameters, allowed_names, yml_file_path=self.yml_file_path, hasEnv=self.has_open_environment(), 
-            metadata_updater=self.global_metadata_updater, readingOrder=self.reading_order).exec()
+            metadata_updater=self.global_metadata_updater, readingOrder=self.reading_order, catalog=self._re_model.catalog).exec()
 
     @Slot()
     def add_instruction_item(self):
         allowed_parameters, allowed_names = self.get_name_param_variables("instruction")
         SophysForm(self._re_model.run_engine, "add_instruction",
             allowed_parameters, allowed_names, hasEnv=self.has_open_environment(), 
-            readingOrder=self.reading_order).exec()
+            readingOrder=self.reading_order, catalog=self._re_model.catalog).exec()
 
     @Slot()
     def add_stop_queue(self):
         allowed_parameters, allowed_names = self.get_name_param_variables('instruction')
         form = SophysForm(
             self._re_model.run_engine, "add_instruction", 
-            allowed_parameters, allowed_names, readingOrder=self.reading_order)
+            allowed_parameters, allowed_names, readingOrder=self.reading_order, catalog=self._re_model.catalog)
         form.addItemToQueue()
 
     @Slot()
@@ -461,7 +1076,7 @@ class QueueModel(ListModel):
         item_type = self.get_item_type()
         allowed_parameters, allowed_names = self.get_name_param_variables(item_type)
         SophysForm(self._re_model.run_engine, "copy",
-            allowed_parameters, allowed_names, readingOrder=self.reading_order).exec()
+            allowed_parameters, allowed_names, readingOrder=self.reading_order, catalog=self._re_model.catalog).exec()
 
     @Slot()
     def edit_queue_item(self):
@@ -469,4 +1084,4 @@ class QueueModel(ListModel):
         item_type = self.get_item_type()
         allowed_parameters, allowed_names = self.get_name_param_variables(item_type)
         SophysForm(self._re_model.run_engine, "edit_"+item_type,
-            allowed_parameters, allowed_names, yml_file_path=self.yml_file_path,readingOrder=self.reading_order).exec()
+            allowed_parameters, allowed_names, yml_file_path=self.yml_file_path,readingOrder=self.reading_order, catalog=self._re_model.catalog).exec()
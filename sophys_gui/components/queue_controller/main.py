@@ -1,9 +1,10 @@
+import time
 import qtawesome as qta
 from qtpy.QtCore import QSize
 from qtpy.QtWidgets import QWidget, QHBoxLayout, QGroupBox, \
     QStackedWidget, QPushButton, QMessageBox
-from sophys_gui.functions import addLineJumps
-from ..led import SophysLed
+from sophys_gui.functions import addLineJumps, showCommandError
+from ..led import SophysLed, SophysConnectionLed
 from .util import CONFIG
 
 
@@ -18,9 +19,15 @@ class QueueController(QWidget):
 
     """
 
-    def __init__(self, run_engine, loginChanged, execution_monitor=False):
+    # Time in seconds during which repeated presses of a button are ignored
+    repeat_window = 0.5
+
+    def __init__(self, run_engine, loginChanged, execution_monitor=False, server_model=None, kafka_broker=None):
         super().__init__()
         self.run_engine = run_engine
+        self.server_model = server_model
+        self.kafka_broker = kafka_broker
+        self._last_commands = {}
         self.updateEvent = self.run_engine.events.status_changed
         self.reStatus = self.run_engine.re_manager_status
         self.isLogged = False
@@ -49,6 +56,37 @@ class QueueController(QWidget):
             envIndex = 1 if envVal else 0
             self.cmdStacks[0].setCurrentIndex(envIndex)
 
+    def isRepeated(self, description):
+        """
+            Check if the same command is still running or was sent just before.
+        """
+        if description not in self._last_commands:
+            return False
+        sentTime, future = self._last_commands[description]
+        isRunning = future is not None and not future.done()
+        return isRunning or time.monotonic() - sentTime < self.repeat_window
+
+    def runCommand(self, description, cmd):
+        """
+            Send a control command to the server, in the background if
+            the server model is available. Repeated presses are sent once.
+        """
+        if self.isRepeated(description):
+            return
+        future = None
+        if self.server_model is None:
+            cmd(self.run_engine)
+        else:
+            future = self.server_model.submitCommand(
+                cmd, self.run_engine, lane="manager",
+                onDone=lambda future: self.onCommandDone(description, future))
+        self._last_commands[description] = (time.monotonic(), future)
+
+    def onCommandDone(self, description, future):
+        error = future.exception()
+        if error is not None:
+            showCommandError(description, error)
+
     def addControlButton(self, btnKey, lay):
         envCmd = CONFIG[btnKey]
         envBtnWid = self.getControllerStack(envCmd)
@@ -97,6 +135,23 @@ class QueueController(QWidget):
         for title, param_dict in statusLeds.items():
             ledGroup = self.addStatusGroup(title, param_dict)
             hlay.addWidget(ledGroup)
+        if self.kafka_broker is not None:
+            hlay.addWidget(self.addKafkaGroup())
+
+    def addKafkaGroup(self):
+        """
+            Create a group monitoring the connection to Kafka.
+        """
+        group = QGroupBox()
+        group.setTitle("Kafka")
+        groupLay = QHBoxLayout()
+        groupLay.setContentsMargins(25, 2, 25, 2)
+        group.setLayout(groupLay)
+
+        kafkaLed = SophysConnectionLed(
+            self.kafka_broker.connectionChanged, self.kafka_broker.connected)
+        groupLay.addWidget(kafkaLed)
+        return group
 
     def getSinglePushButton(self, btnConfig):
         btn = QPushButton(btnConfig["title"])
@@ -104,7 +159,8 @@ class QueueController(QWidget):
         btn.setIconSize(QSize(20, 20))
         if "cmd" in btnConfig:
             btn.clicked.connect(
-                lambda _, cmd=btnConfig["cmd"]: cmd(self.run_engine))
+                lambda _, cmd=btnConfig["cmd"], title=btnConfig["title"]:
+                    self.runCommand(title.lower(), cmd))
         tooltipMsg = addLineJumps(btnConfig["tooltip"])
         btn.setToolTip(tooltipMsg)
         if "enabled" in btnConfig:
@@ -138,8 +194,11 @@ class QueueController(QWidget):
     def handle_destroy(self):
         confirmation = self.confirmationDialog()
         if confirmation:
-            self.run_engine.activate_env_destroy(True)
-            self.run_engine.environment_destroy(timeout=5)
+            self.runCommand("destroy the environment", self.destroyEnvironment)
+
+    def destroyEnvironment(self, run_engine):
+        run_engine.activate_env_destroy(True)
+        run_engine.environment_destroy(timeout=5)
 
     def addDestroyButton(self, hlay):
         group = QGroupBox()
@@ -3,8 +3,9 @@ from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QWidget, QGridLayout, \
     QLabel, QGroupBox, QHBoxLayout, QSizePolicy
 from sophys_gui.functions import getHeader, createSingleBtn, \
-    addArgsToKwargs, openYaml
+    addArgsToKwargs
 from ..led import SophysLed
+from ..config import SophysDisplayConfig
 from .util import CONTROL_BTNS
 from .progress import ProgressBar
 
@@ -29,9 +30,12 @@ class SophysRunningItem(QWidget):
         super().__init__()
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.group = QGroupBox()
+        self.model = model
         self.runEngine = model.run_engine
         self.yml_file_path = yml_file_path
-        self.config = openYaml(self.yml_file_path)
+        self.displayConfig = SophysDisplayConfig.fromPath(self.yml_file_path)
+        self.config = self.displayConfig.snapshot
+        self.displayConfig.configChanged.connect(self.onDisplayConfigChanged)
         self._setupUi(loginChanged, kafka_bootstrap, kafka_topic)
 
     def createBtns(self, glay, loginChanged):
@@ -45,26 +49,11 @@ class SophysRunningItem(QWidget):
             glay.addWidget(btn, 7, idy, 1, 2)
 
     def newKwargsName(self, runningItem):
-
+        """
+            Get the display titles of the running item parameters.
+        """
         name = runningItem.get("name", "")
-        plan_configuration = self.config.get(name, {})
-        parameters_dict = plan_configuration.get("param_names", {})
-
-        kwargs_dict = dict()
-
-        if isinstance(parameters_dict, dict):
-
-            for value in parameters_dict.values():
-
-                if isinstance(value, dict):
-                    kwargs_dict.update(value)
-            
-                else:
-                    kwargs_dict.update(parameters_dict)
-                    break
-
-        return kwargs_dict
-            
+        return self.config.getParamTitles(name)
 
     def createDictionaryWidget(self, arg_dict, runningItem):
         """
@@ -102,16 +91,15 @@ class SophysRunningItem(QWidget):
         """
             Append the args into the kwargs dictionary.
         """
-        if not "kwargs" in runningItem:
-            runningItem["kwargs"] = {}
+        kwargs = runningItem.get("kwargs", {})
         if "args" in runningItem:
             hasArgs = len(runningItem["args"]) != 0
             if hasArgs:
                 argsList = [
-                    runningItem["args"], runningItem["kwargs"]
+                    runningItem["args"], kwargs
                 ]
-                addArgsToKwargs(argsList)
-        return runningItem["kwargs"]
+                kwargs = addArgsToKwargs(argsList)
+        return kwargs
 
     def getValueWidget(self, runningItem, key):
         """
@@ -122,7 +110,7 @@ class SophysRunningItem(QWidget):
 
             if key == 'name':
                 plan_name = runningItem[key]
-                item = self.config.get(plan_name, {}).get("name", plan_name)
+                item = self.config.getDisplayName(plan_name)
             else:
                 item = runningItem[key]
         if isinstance(item, str):
@@ -134,6 +122,13 @@ class SophysRunningItem(QWidget):
         return value
 
 
+    def onDisplayConfigChanged(self, snapshot):
+        """
+            Show the running item again with the new display configuration.
+        """
+        self.config = snapshot
+        self.updateRunningItemWidget(None)
+
     @DeferredFunction
     def updateRunningItemWidget(self, evt):
         """
@@ -182,7 +177,8 @@ class SophysRunningItem(QWidget):
         loading = self.createLoading()
         glay.addWidget(loading, 0, 1, 1, 1)
 
-        progressBar = ProgressBar(self.runEngine, kafka_bootstrap, kafka_topic)
+        progressBar = ProgressBar(
+            self.runEngine, kafka_bootstrap, kafka_topic, server_model=self.model)
         progressBar.setOrientation(Qt.Horizontal)
         glay.addWidget(progressBar, 1, 0, 1, 2)
 
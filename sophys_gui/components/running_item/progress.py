@@ -1,6 +1,8 @@
+import time
 from qtpy.QtCore import QTimer
 from qtpy.QtWidgets import QProgressBar
 from sophys_gui.server import KafkaDataRegister
+from sophys_gui.functions import addArgsToKwargs
 from suitscase.utilities.threading import DeferredFunction
 
 
@@ -9,27 +11,45 @@ class ProgressBar(QProgressBar):
         Widget that displays the progress of the current plan.
     """
 
-    def __init__(self, run_engine, kafka_bootstrap, kafka_topic):
+    # Shortest time in milliseconds between two updates, about one display frame
+    frame_interval = 16
+
+    def __init__(self, run_engine, kafka_bootstrap, kafka_topic, server_model=None):
         super().__init__()
         self.run_engine = run_engine
         self.total_events = 1
-        self.event_sum = 0
-        self.last_run = 0
+        self.revision = None
         self.multi_run = False
+        self.running = False
+        self.last_update = 0
         self.setMaximum(100)
         self.setMinimum(0)
         self.metadata = {}
-        self.kafka_monitor = KafkaDataRegister(kafka_bootstrap, kafka_topic)
-        self.kafka_timer = QTimer()
-        self.kafka_timer.setInterval(150)
-        self.kafka_timer.timeout.connect(self.kafka_monitor_callback)
+        if server_model is None:
+            self.kafka_monitor = KafkaDataRegister(kafka_bootstrap, kafka_topic)
+        else:
+            self.kafka_monitor = KafkaDataRegister(
+                kafka_bootstrap, kafka_topic, server_model.startWorker)
+        self.frame_timer = QTimer()
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.kafka_monitor_callback)
+        self.kafka_monitor.progressChanged.connect(self.onProgressChanged)
         self.run_engine.events.running_item_changed.connect(self.runningItemChanged)
 
     @DeferredFunction
     def handle_plan_args(self, runningItem):
+        self.setTotalEvents(runningItem)
+        self.onProgressChanged()
+
+    def setTotalEvents(self, runningItem):
+        """
+            Get the number of events of the running plan from its arguments.
+        """
         self.total_events = self.metadata.get("total_seq_num", 1)
 
-        kwargs = runningItem["kwargs"]
+        kwargs = runningItem.get("kwargs", {})
+        if len(runningItem.get("args", [])) != 0:
+            kwargs = addArgsToKwargs([runningItem["args"], kwargs])
         isGrid = "grid" in runningItem["name"]
         isList = "list" in runningItem["name"]
        
@@ -60,38 +80,42 @@ class ProgressBar(QProgressBar):
         hasRunningItem = len(runningItem) != 0
         if hasRunningItem:
             self.handle_plan_args(runningItem)
-            self.kafka_timer.start()
+            self.running = True
             self.setVisible(True)
         else:
-            self.kafka_timer.stop()
+            self.running = False
+            self.frame_timer.stop()
             self.setVisible(False)
             self.setValue(0)
             self.multi_run = False
-            self.last_run = 0
-            self.event_sum = 0
-            self.kafka_monitor.get_data()
+            self.kafka_monitor.reset()
+
+    def onProgressChanged(self):
+        """
+            Update the progress at once, or at the end of the current
+            frame if it was already updated during it.
+        """
+        if self.frame_timer.isActive():
+            return
+        elapsed = (time.monotonic() - self.last_update) * 1000
+        if elapsed >= self.frame_interval:
+            self.kafka_monitor_callback()
+        else:
+            self.frame_timer.start(int(self.frame_interval - elapsed) + 1)
 
-    @DeferredFunction
     def kafka_monitor_callback(self):
-        kafka_data = self.kafka_monitor.get_data()
-        events_size = len(kafka_data)
+        state = self.kafka_monitor.get_state()
+        if not self.running:
+            return
+        self.last_update = time.monotonic()
+        if state["revision"] == self.revision:
+            return
+        self.revision = state["revision"]
 
-        if events_size > 0:
-            if "total_seq_num" in kafka_data[0]:
-                self.metadata = kafka_data[0]
-                self.total_events = int(self.metadata.get("total_seq_num", 1))
-                self.multi_run = True
+        if "total_seq_num" in state["metadata"]:
+            self.metadata = state["metadata"]
+            self.total_events = int(self.metadata.get("total_seq_num", 1))
+            self.multi_run = True
 
-            last_run = kafka_data[-1]
-            seq_num = 0
-            if "seq_num" in last_run:
-                if self.multi_run:
-                    if last_run["seq_num"] > self.last_run:
-                        self.event_sum += last_run["seq_num"] - self.last_run
-                    else:
-                        self.event_sum += last_run["seq_num"]
-                    seq_num = self.event_sum
-                    self.last_run = last_run["seq_num"]
-                else:
-                    seq_num = last_run["seq_num"]
-                self.setValue(int(100*seq_num/self.total_events))
\ No newline at end of file
+        seq_num = state["event_count"] if self.multi_run else state["seq_num"]
+        self.setValue(int(100*seq_num/self.total_events))
\ No newline at end of file
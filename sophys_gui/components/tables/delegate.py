@@ -0,0 +1,59 @@
+import qtawesome as qta
+from qtpy.QtCore import Qt, QEvent, QSize, Signal
+from qtpy.QtWidgets import QStyledItemDelegate, QStyleOptionButton, \
+    QStyle, QApplication
+
+
+class SophysActionDelegate(QStyledItemDelegate):
+    """
+        Delegate that paints a row action button and handles its clicks,
+        so that no button widget is created for each table row.
+    """
+
+    clicked = Signal([int])
+
+    def __init__(self, btn_dict, parent=None):
+        super().__init__(parent)
+        self.icon = qta.icon(btn_dict["icon"])
+        self.iconSize = QSize(16, 16)
+        self.pressedRow = -1
+
+    def isEnabled(self, model):
+        """
+            Read the action permission from the model.
+        """
+        return model.getActionsEnabled()
+
+    def paint(self, painter, option, index):
+        """
+            Paint the row background and the action button.
+        """
+        super().paint(painter, option, index)
+        btn = QStyleOptionButton()
+        btn.rect = option.rect.adjusted(4, 4, -4, -4)
+        btn.icon = self.icon
+        btn.iconSize = self.iconSize
+        btn.state = QStyle.State_Raised
+        if self.isEnabled(index.model()):
+            btn.state |= QStyle.State_Enabled
+            if index.row() == self.pressedRow:
+                btn.state |= QStyle.State_Sunken
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, btn, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        """
+            Emit the clicked row when the button is released over it.
+        """
+        isLeftButton = getattr(event, "button", lambda: None)() == Qt.LeftButton
+        if not isLeftButton or not self.isEnabled(model):
+            return False
+        if event.type() == QEvent.MouseButtonPress:
+            self.pressedRow = index.row()
+        elif event.type() == QEvent.MouseButtonRelease:
+            wasPressed = self.pressedRow == index.row()
+            self.pressedRow = -1
+            if wasPressed and option.rect.contains(event.pos()):
+                self.clicked.emit(index.row())
+                return True
+        return False
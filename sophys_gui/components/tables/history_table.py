@@ -1,11 +1,11 @@
 import qtawesome as qta
 from qtpy.QtWidgets import QVBoxLayout, QWidget, \
-    QGridLayout, QPushButton
+    QGridLayout, QPushButton, QHBoxLayout, QLineEdit, QComboBox
 
 from sophys_gui.functions import getHeader, addLineJumps
-from ..list_models import HistoryModel
-from .table_view import SophysTable
-from .util import HISTORY_BTNS
+from ..list_models import HistoryModel, ListFilterModel
+from .table_view import SophysTable, SophysStaleLabel
+from .util import HISTORY_BTNS, HISTORY_STATUS_FILTERS
 
 
 class SophysHistoryTable(QWidget):
@@ -23,6 +23,8 @@ class SophysHistoryTable(QWidget):
     def __init__(self, model, loginChanged, yml_file_path = None):
         super().__init__()
         self.queueModel = HistoryModel(model, yml_file_path)
+        self.filterModel = ListFilterModel(self.queueModel)
+        self.serverModel = model
         self.cmd_btns = {}
         self.index = 0
         self._setupUi(loginChanged)
@@ -75,12 +77,34 @@ class SophysHistoryTable(QWidget):
         loginChanged.connect(
             lambda loginStatus: table.setLogin(loginStatus, self.cmd_btns))
 
+    def getFilterControls(self):
+        """
+            Create the inputs for searching the history items.
+        """
+        hlay = QHBoxLayout()
+
+        search = QLineEdit()
+        search.setPlaceholderText("Search")
+        search.setClearButtonEnabled(True)
+        search.setToolTip(addLineJumps("Show only the items whose name, user, " \
+            "exit status or arguments contain the text."))
+        search.textChanged.connect(self.filterModel.setFilterText)
+        hlay.addWidget(search)
+
+        status = QComboBox()
+        status.addItems(HISTORY_STATUS_FILTERS)
+        status.setToolTip(addLineJumps("Show only the items with this exit status."))
+        status.currentIndexChanged.connect(
+            lambda idx: self.filterModel.setStatusFilter(
+                HISTORY_STATUS_FILTERS[idx] if idx > 0 else ""))
+        hlay.addWidget(status)
+
+        return hlay
+
     def detectScroll(self, index):
         self.index = index
-        self.queueModel.visible_rows = (
-            self.queueModel.rowCount() - index - 25,
-            self.queueModel.rowCount() - index
-        )
+        self.queueModel.visible_rows = self.filterModel.getSourceRows(index, index + 25)
+        self.table.resizeRows(index, index + 25)
 
     def rowCountUpdate(self, rowCount):
         self.detectScroll(self.index)
@@ -92,16 +116,23 @@ class SophysHistoryTable(QWidget):
         header = getHeader("History")
         vlay.addWidget(header)
 
-        table = SophysTable(self.queueModel)
+        filters = self.getFilterControls()
+        vlay.addLayout(filters)
+
+        table = SophysTable(self.filterModel)
+        vlay.addWidget(SophysStaleLabel(self.serverModel, table))
         vlay.addWidget(table)
 
         controls = self.getTableControls()
         vlay.addLayout(controls)
 
         self.queueModel.updateTable.connect(self.rowCountUpdate)
-        table.pressed.connect(
-            lambda _, cmd_btns=self.cmd_btns: table.updateIndex(cmd_btns))
+        table.selectionModel().selectionChanged.connect(
+            lambda *_, cmd_btns=self.cmd_btns: table.updateIndex(cmd_btns))
         table.verticalScrollBar().valueChanged.connect(self.detectScroll)
+        self.filterModel.layoutChanged.connect(lambda: self.detectScroll(self.index))
+        self.filterModel.rowsInserted.connect(lambda *_: self.detectScroll(self.index))
+        self.filterModel.rowsRemoved.connect(lambda *_: self.detectScroll(self.index))
         self.table = table
 
         self.handleLoginChanged(loginChanged, table)
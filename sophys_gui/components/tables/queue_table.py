@@ -1,11 +1,12 @@
 import qtawesome as qta
 from qtpy.QtWidgets import QVBoxLayout, QHBoxLayout, \
-    QWidget, QGridLayout, QPushButton
+    QWidget, QGridLayout, QPushButton, QLineEdit, QAbstractItemView
 
 from sophys_gui.functions import getHeader, addLineJumps
 from ..switch import SophysSwitchButton
-from ..list_models import QueueModel
-from .table_view import SophysTable
+from ..list_models import QueueModel, ListFilterModel
+from .table_view import SophysTable, SophysStaleLabel
+from .delegate import SophysActionDelegate
 from .util import QUEUE_BTNS, QUEUE_TABLE_BTNS
 
 
@@ -24,6 +25,7 @@ class SophysQueueTable(QWidget):
     def __init__(self, model, loginChanged, reading_order, yml_file_path=None):
         super().__init__()
         self.queueModel = QueueModel(model, reading_order, yml_file_path)
+        self.filterModel = ListFilterModel(self.queueModel)
         self.serverModel = model
         self.loop = None
         self.cmd_btns = {}
@@ -77,6 +79,18 @@ class SophysQueueTable(QWidget):
 
         return hlay
 
+    def getSearchInput(self):
+        """
+            Create the input for searching the queue items.
+        """
+        search = QLineEdit()
+        search.setPlaceholderText("Search")
+        search.setClearButtonEnabled(True)
+        search.setToolTip(addLineJumps("Show only the items whose name, user " \
+            "or arguments contain the text."))
+        search.textChanged.connect(self.filterModel.setFilterText)
+        return search
+
     def handleCommand(self, cmd, title, hasConfirmation, row):
         """
             Handle button click.
@@ -85,12 +99,12 @@ class SophysQueueTable(QWidget):
         if hasConfirmation:
             confirmation = self.table.confirmationDialog(title)
         if row!=None:
-            self.queueModel.select(row)
+            self.table.selectRow(row)
         if confirmation:
             cmd(self.queueModel)
             self.table.updateIndex(self.cmd_btns)
 
-    def createSingleBtn(self, btn_dict, idx=None):
+    def createSingleBtn(self, btn_dict):
         """
             Create a single button for interacting with the Bluesky Queue.
         """
@@ -102,8 +116,8 @@ class SophysQueueTable(QWidget):
         hasConfirmation = "confirm" in btn_dict
         btn.clicked.connect(
             lambda _, cmd=btn_dict["cmd"],
-            title=title, hasConf=hasConfirmation, idx=idx: self.handleCommand(
-                cmd, title, hasConf, idx))
+            title=title, hasConf=hasConfirmation: self.handleCommand(
+                cmd, title, hasConf, None))
         btn.setIcon(qta.icon(btn_dict["icon"]))
         btn.setEnabled(btn_dict["enabled"])
         tooltipMsg = addLineJumps(btn_dict["tooltip"])
@@ -132,25 +146,21 @@ class SophysQueueTable(QWidget):
 
         return glay
 
-    def setTableOperationButtons(self, table, rowCount=None):
+    def setTableOperationDelegates(self, table):
         """
-            Create buttons inside a table row for interacting with
+            Paint the buttons inside the table rows for interacting with
             that specific plan.
         """
-        rows = self.queueModel.rowCount()
-        colCount = self.queueModel.columnCount()-2
-        self.cmd_btns["table"] = {}
-        for idx in range(0, rows):
-            for idy, btn_dict in enumerate(QUEUE_TABLE_BTNS):
-                btn = self.createSingleBtn(btn_dict, idx)
-                table.setIndexWidget(self.queueModel.index(idx, colCount+idy), btn)
-                self.cmd_btns["table"][f"{idx}__{idy}"] = {
-                    "btn": btn,
-                    "permission": 0
-                }
-
-        if rowCount:
-            table.detectChange(rowCount, self.cmd_btns)
+        colCount = self.queueModel.columnCount()-len(QUEUE_TABLE_BTNS)
+        self.actionDelegates = []
+        for idy, btn_dict in enumerate(QUEUE_TABLE_BTNS):
+            delegate = SophysActionDelegate(btn_dict, table)
+            hasConfirmation = "confirm" in btn_dict
+            delegate.clicked.connect(
+                lambda row, cmd=btn_dict["cmd"], hasConf=hasConfirmation: self.handleCommand(
+                    cmd, "", hasConf, row))
+            table.setItemDelegateForColumn(colCount+idy, delegate)
+            self.actionDelegates.append(delegate)
 
     def handleLoginChanged(self, loginChanged, table):
         """
@@ -167,20 +177,24 @@ class SophysQueueTable(QWidget):
         header = self.getHeader()
         vlay.addLayout(header)
 
-        table = SophysTable(self.queueModel)
+        search = self.getSearchInput()
+        vlay.addWidget(search)
+
+        table = SophysTable(self.filterModel)
+        table.setDragDropMode(QAbstractItemView.InternalMove)
+        table.setDragDropOverwriteMode(False)
         self.table = table
+        vlay.addWidget(SophysStaleLabel(self.serverModel, table))
         vlay.addWidget(table)
 
-        self.setTableOperationButtons(table)
+        self.setTableOperationDelegates(table)
 
         controls = self.getTableControls()
         vlay.addLayout(controls)
 
         self.queueModel.updateTable.connect(
-            lambda rowCount, table=table: self.setTableOperationButtons(table, rowCount))
-        self.queueModel.updateTable.connect(
-            lambda _, cmd_btns=self.cmd_btns: table.updateIndex(cmd_btns))
-        table.pressed.connect(
-            lambda _, cmd_btns=self.cmd_btns: table.updateIndex(cmd_btns))
+            lambda rowCount, cmd_btns=self.cmd_btns: table.detectChange(rowCount, cmd_btns))
+        table.selectionModel().selectionChanged.connect(
+            lambda *_, cmd_btns=self.cmd_btns: table.updateIndex(cmd_btns))
 
         self.handleLoginChanged(loginChanged, table)
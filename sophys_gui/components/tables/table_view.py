@@ -1,5 +1,6 @@
-from qtpy.QtCore import QTimer
-from qtpy.QtWidgets import QTableView, QHeaderView, QMessageBox
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtWidgets import QTableView, QHeaderView, QMessageBox, \
+    QAbstractItemView, QLabel
 
 
 class SophysTable(QTableView):
@@ -14,8 +15,12 @@ class SophysTable(QTableView):
         self.setResizable()
         self.timer=QTimer()
         self.loginStatus = False
+        self.stale = False
+        self.borderColor = "#ddd"
         self.timer.timeout.connect(self.resetBorder)
-        self.pressed.connect(self.selectItem)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.selectionModel().selectionChanged.connect(self.selectItems)
 
     def getLimitsPermissions(self, sel_row, condition):
         """
@@ -64,17 +69,16 @@ class SophysTable(QTableView):
             Update the GUI permissions status.
         """
         for key, value in cmd_btns.items():
-            if key == "table":
-                self.updateIndex(value)
-            else:
-                status = self.handleBtnEnabled(value["permission"], self.model())
-                cmd_btns[key]["btn"].setEnabled(status)
+            status = self.handleBtnEnabled(value["permission"], self.model())
+            cmd_btns[key]["btn"].setEnabled(status)
 
     def setLogin(self, loginStatus, cmd_btns):
         """
             Handle the permission for the login and logout.
         """
         self.loginStatus = loginStatus
+        self.model().setActionsEnabled(loginStatus)
+        self.viewport().update()
         self.updateIndex(cmd_btns)
 
     def confirmationDialog(self, title):
@@ -91,9 +95,21 @@ class SophysTable(QTableView):
         """
             Reset Border style.
         """
-        self.setStyleSheet("QTableView{ border: 1px solid #ddd;}")
+        self.setBorder("#ddd")
         self.timer.stop()
 
+    def setBorder(self, color):
+        self.borderColor = color
+        textColor = " color: gray;" if self.stale else ""
+        self.setStyleSheet("QTableView{ border: 1px solid " + color + ";" + textColor + "}")
+
+    def setStale(self, stale):
+        """
+            Grey out the items while they are the ones saved by the last session.
+        """
+        self.stale = stale
+        self.setBorder(self.borderColor)
+
     def detectChange(self, rowCount, cmd_btns):
         """
             Handle the permission when the table changes and shows
@@ -104,19 +120,18 @@ class SophysTable(QTableView):
         additionChange = rowCount > self.currRows
         deletionChange = rowCount < self.currRows
         if deletionChange:
-            self.setStyleSheet("QTableView{ border: 1px solid #ff0000;}")
+            self.setBorder("#ff0000")
         elif additionChange:
-            self.setStyleSheet("QTableView{ border: 1px solid #00ff00;}")
+            self.setBorder("#00ff00")
         self.currRows = rowCount
         self.timer.start(1000)
 
-    def selectItem(self):
+    def selectItems(self, *_):
         """
-            Select row.
+            Select the items of all the selected rows.
         """
-        table_model = self.model()
-        row = self.currentIndex().row()
-        table_model.select(row)
+        rows = sorted(index.row() for index in self.selectionModel().selectedRows())
+        self.model().setSelectedRows(rows)
 
     def setHorizontalResizePolicy(self):
         """
@@ -132,10 +147,79 @@ class SophysTable(QTableView):
             hor_header.setSectionResizeMode(
                 idcol, resize_pol)
 
+    def resizeRows(self, first, last):
+        """
+            Fit only the given rows to their contents.
+        """
+        for row in range(max(first, 0), min(last, self.model().rowCount() - 1) + 1):
+            self.resizeRowToContents(row)
+
+    def resizeVisibleRows(self):
+        """
+            Fit only the rows shown in the viewport to their contents.
+        """
+        first = self.rowAt(0)
+        last = self.rowAt(self.viewport().height() - 1)
+        if first < 0:
+            first = 0
+        if last < 0:
+            last = self.model().rowCount() - 1
+        self.resizeRows(first, last)
+
+    def setVerticalResizePolicy(self):
+        """
+            Handle the table vertical resizing, measuring only the rows
+            that were inserted, moved or changed instead of the whole table.
+        """
+        model = self.model()
+        self.verticalHeader().setSectionResizeMode(
+            QHeaderView.Interactive)
+        model.rowsInserted.connect(
+            lambda _, first, last: self.resizeRows(first, last))
+        model.rowsMoved.connect(
+            lambda _, first, last, __, row: self.resizeRows(
+                row if row < first else row - (last - first + 1),
+                row + (last - first) if row < first else row - 1))
+        model.dataChanged.connect(
+            lambda topLeft, bottomRight: self.resizeRows(
+                topLeft.row(), bottomRight.row()))
+        model.modelReset.connect(self.resizeRowsToContents)
+        model.layoutChanged.connect(self.resizeVisibleRows)
+        self.resizeTimer = QTimer()
+        self.resizeTimer.setSingleShot(True)
+        self.resizeTimer.timeout.connect(self.resizeRowsToContents)
+        self.horizontalHeader().sectionResized.connect(
+            lambda *_: self.resizeTimer.start(0))
+        self.resizeRowsToContents()
+
     def setResizable(self):
         """
             Handle the table resizing.
         """
-        self.verticalHeader().setSectionResizeMode(
-            QHeaderView.ResizeToContents)
+        self.setVerticalResizePolicy()
         self.setHorizontalResizePolicy()
+
+
+class SophysStaleLabel(QLabel):
+    """
+        Warning shown above a table, which is greyed out, while the server model
+        shows the state saved by the last session and until it is reconciled
+        with the Queue Server.
+    """
+
+    def __init__(self, server_model, table):
+        super().__init__("Showing the state saved by the last session, " \
+            "waiting for the Queue Server...")
+        self.table = table
+        self.isStale = None
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet("color: gray; font-style: italic;")
+        self.updateState(server_model.stale)
+        server_model.subscribe(
+            lambda status: server_model.stale != self.isStale,
+            lambda status: self.updateState(server_model.stale))
+
+    def updateState(self, stale):
+        self.isStale = stale
+        self.setVisible(stale)
+        self.table.setStale(stale)
@@ -33,7 +33,7 @@ QUEUE_BTNS = [
         "cmd": lambda re: re.move_top(),
         "enabled": False,
         "permission": 3,
-        "tooltip": "Move the selected item to the first position of the queue."
+        "tooltip": "Move the selected items to the first positions of the queue."
     },
     {
         "title": "Up",
@@ -57,7 +57,7 @@ QUEUE_BTNS = [
         "cmd": lambda re: re.move_bottom(),
         "enabled": False,
         "permission": 2,
-        "tooltip": "Move the selected item to the last position of the queue."
+        "tooltip": "Move the selected items to the last positions of the queue."
     },
     {
         "title": "Add Plan",
@@ -74,8 +74,8 @@ QUEUE_BTNS = [
         "cmd": lambda re: re.duplicate_item(),
         "enabled": False,
         "permission": 1,
-        "tooltip": "Duplicate the selected item data into a new queue "\
-            "item that will be placed after the selected item."
+        "tooltip": "Duplicate the selected items data into new queue "\
+            "items that will be placed after the last selected item."
     },
     {
         "title": "Add Stop Item",
@@ -86,6 +86,15 @@ QUEUE_BTNS = [
         "tooltip": "Add an instruction for stopping the queue " \
             "and placed it in the last position of the queue."
     },
+    {
+        "title": "Delete",
+        "icon": "fa5s.trash-alt",
+        "cmd": lambda re: re.delete_item(),
+        "enabled": False,
+        "confirm": True,
+        "permission": 1,
+        "tooltip": "Delete all the selected queue items."
+    },
     {
         "title": "Clear All",
         "icon": "mdi.sort-variant-remove",
@@ -114,3 +123,7 @@ QUEUE_TABLE_BTNS = [
         "permission": 0
     }
 ]
+
+HISTORY_STATUS_FILTERS = [
+    "All", "completed", "failed", "stopped", "aborted", "halted"
+]
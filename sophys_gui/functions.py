@@ -2,10 +2,24 @@ import qtawesome as qta
 import os as _os
 import yaml
 import ast
+import re
+import typing
 from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QLabel, QPushButton, QDoubleSpinBox, \
-    QSpinBox
+    QSpinBox, QApplication
 
+NoneType = type(None)
+
+UNKNOWN_TYPES = {
+    "typing.Sequence": "typing.List",
+    "__PLAN_OR_DEVICE__": "typing.Any",
+    "__PLAN__": "typing.Any",
+    "__READABLE__": "typing.Any",
+    "__DEVICE__": "typing.Any",
+    "__CALLABLE__": "typing.Any",
+    "__MOVABLE__": "typing.Any",
+    "__FLYABLE__": "typing.Any"
+}
 
 def getItemRecursively(original_obj: object, attrs: list):
     """
@@ -74,11 +88,14 @@ def createSingleBtn(btnDict, runEngine):
 
 def addArgsToKwargs(argsList):
     """
-        Concatenate arguments and keyword arguments.
+        Concatenate arguments and keyword arguments into a new dictionary,
+        without modifying the original item.
     """
-    args = argsList[0].copy()
-    argsList[1]["detectors"] = args.pop(0)
-    argsList[1]["args"] = args
+    args = list(argsList[0])
+    kwargs = dict(argsList[1]) if argsList[1] else {}
+    kwargs["detectors"] = args.pop(0)
+    kwargs["args"] = args
+    return kwargs
 
 def getMotorInput(paramMeta):
     separator = "-.-"
@@ -89,6 +106,57 @@ def getMotorInput(paramMeta):
         return motorTyping
     return None
 
+def getMotorDescription(paramMeta):
+    """
+        Get the parameter description without the motor input specification.
+    """
+    description = paramMeta["description"]
+    try:
+        extraIdx = description.index("-.-")
+        description = description[:extraIdx]
+    except Exception:
+        pass
+    return description
+
+def replaceUnknownTypes(varType):
+    """
+        Replace bluesky types for python types in order for the
+        type check to work.
+    """
+    for keyType, replaceType in UNKNOWN_TYPES.items():
+        varType = varType.replace(keyType, replaceType)
+    return varType
+
+def convertTypeToPythonType(varType):
+    """
+        Evaluate a type string to a python variable type. Types that can't
+        be evaluated, such as custom enums, fall back to object.
+    """
+    varType = replaceUnknownTypes(varType)
+    if varType == "":
+        return object
+    try:
+        return eval(varType)
+    except Exception:
+        return object
+
+def getParamPythonType(paramMeta):
+    """
+        Convert a string or an array to a python variable type.
+    """
+    isArgs = "-.-" in paramMeta["description"] if "description" in paramMeta else False
+    if isArgs:
+        motorTyping = getMotorInput(paramMeta).replace("\"", "'").replace("',", "|")
+        motorArray = motorTyping.split(";")
+        motorTypes = motorArray[2].split(",")
+        arrayType = []
+        for strType in motorTypes:
+            strType = strType.replace("|", "',")
+            arrayType.append(convertTypeToPythonType(strType))
+        return arrayType
+    hasAnnotation = "annotation" in paramMeta
+    varType = paramMeta["annotation"]["type"] if hasAnnotation else ""
+    return varType
 
 def handleSpinboxWidget(valueType):
     """
@@ -127,6 +195,17 @@ def addLineJumps(message):
         newMsg += newLine
     return newMsg
 
+def showCommandError(description, error):
+    """
+        Show a popup for a command rejected by the server.
+    """
+    print("Failed to {}: {}".format(description, error))
+    app = QApplication.instance()
+    if not getattr(app, "popup", None):
+        return
+    message = app.verifyKnownExceptions(error)
+    app.showExpectedError(message or "Failed to {}!".format(description))
+
 def openYaml(yml_file_path):
     if yml_file_path:
         with open(yml_file_path, "r") as f:
@@ -134,3 +213,81 @@ def openYaml(yml_file_path):
 
         return config
     return {}
+
+def getContiguousBlocks(rows):
+    """
+        Group a list of row numbers into (first, last) blocks of consecutive rows.
+    """
+    blocks = []
+    for row in sorted(rows):
+        if blocks and blocks[-1][1] == row - 1:
+            blocks[-1][1] = row
+        else:
+            blocks.append([row, row])
+    return [tuple(block) for block in blocks]
+
+def getStableKeys(oldKeys, newKeys):
+    """
+        Get the largest set of keys that keep their relative order between
+        two orderings of the same keys (longest increasing subsequence).
+    """
+    oldPos = {key: idx for idx, key in enumerate(oldKeys)}
+    positions = [oldPos[key] for key in newKeys]
+    tails = []
+    tailIdx = []
+    parent = [-1] * len(positions)
+    for idx, pos in enumerate(positions):
+        low, high = 0, len(tails)
+        while low < high:
+            mid = (low + high) // 2
+            if tails[mid] < pos:
+                low = mid + 1
+            else:
+                high = mid
+        if low > 0:
+            parent[idx] = tailIdx[low - 1]
+        if low == len(tails):
+            tails.append(pos)
+            tailIdx.append(idx)
+        else:
+            tails[low] = pos
+            tailIdx[low] = idx
+    stable = set()
+    idx = tailIdx[-1] if tailIdx else -1
+    while idx >= 0:
+        stable.add(newKeys[idx])
+        idx = parent[idx]
+    return stable
+
+
+def isOptionalType(paramType):
+    """
+        Check if a type string, or every type of a motor input, is Optional.
+    """
+    if isinstance(paramType, list):
+        return len(paramType) > 0 and all(isOptionalType(str(item)) for item in paramType)
+    return "Optional" in paramType
+
+
+def parseParameter(paramMeta):
+    """
+        Parse the metadata of a plan or instruction parameter.
+    """
+    hasDescription = "description" in paramMeta
+    isArgs = "-.-" in paramMeta["description"] if hasDescription else False
+    description = getMotorDescription(paramMeta) if hasDescription else None
+    paramType = getParamPythonType(paramMeta)
+    pythonType = paramType
+    if isinstance(pythonType, str):
+        pythonType = convertTypeToPythonType(pythonType)
+    return {
+        "name": paramMeta["name"],
+        "kind": paramMeta["kind"]["name"] if "kind" in paramMeta else None,
+        "description": description,
+        "tooltip": re.sub("\n+", ". ", description) if hasDescription else None,
+        "motor": getMotorInput(paramMeta) if isArgs else None,
+        "type": paramType,
+        "python_type": pythonType,
+        "required": not ("default" in paramMeta or isOptionalType(paramType)),
+        "meta": paramMeta
+    }
@@ -0,0 +1,64 @@
+from qtpy.QtCore import QObject, Qt, Signal, Slot
+from sophys_live_view.utils.kafka_data_source import KafkaDataSource
+
+
+class DocumentRelay(QObject):
+    """
+        Forward the (name, document) pairs emitted from a worker thread to a
+        handler called on the thread that created the relay.
+    """
+
+    documentReceived = Signal(str, object)
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.documentReceived.connect(self.onDocumentReceived, Qt.QueuedConnection)
+
+    @Slot(str, object)
+    def onDocumentReceived(self, name, document):
+        try:
+            self.handler(name, document)
+        except Exception as e:
+            print("Live view failed to handle a {} document: {}".format(name, e))
+
+
+class SophysKafkaDataSource(KafkaDataSource):
+    """
+        Live view data source fed by a subscription to the shared
+        KafkaDocumentBroker instead of a Kafka consumer of its own, so
+        each document is fetched and decoded once for the whole GUI.
+
+        The consumer of KafkaDataSource is never started: the documents are
+        passed to handle_document, the entry point its consumer calls for each
+        (name, document) pair, on the GUI thread.
+    """
+
+    def __init__(self, kafka_broker, hour_offset=1, startWorker=None, maxsize=10000):
+        if not callable(getattr(KafkaDataSource, "handle_document", None)):
+            raise TypeError(
+                "This version of sophys_live_view can't be fed by the shared "
+                "Kafka consumer: KafkaDataSource.handle_document is missing")
+        super().__init__(
+            kafka_broker.kafka_topic, [kafka_broker.kafka_uri], hour_offset=hour_offset)
+        self.kafka_broker = kafka_broker
+        self.startWorker = startWorker or kafka_broker.startWorker
+        self.maxsize = maxsize
+        self.subscription = None
+        self.relay = DocumentRelay(self.handle_document)
+
+    def start(self):
+        """
+            Start receiving the documents of the shared broker.
+        """
+        if self.subscription is not None:
+            return
+        self.subscription = self.kafka_broker.subscribe(self.maxsize, full_documents=True)
+        self.startWorker("kafka live view", self.monitor, self.subscription.close)
+
+    def monitor(self):
+        while True:
+            document = self.subscription.get()
+            if document is None:
+                return
+            self.relay.documentReceived.emit(*document)
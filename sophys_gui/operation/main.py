@@ -5,6 +5,7 @@ from qtpy.QtWidgets import QMainWindow, QWidget, QSplitter, \
 from sophys_gui.components import SophysQueueTable, \
     SophysHistoryTable, SophysRunningItem, QueueController, \
     SophysConsoleMonitor, SophysLogin
+from sophys_gui.server import KafkaDocumentBroker
 from sophys_live_view.utils.data_source_manager import DataSourceManager
 from sophys_live_view.widgets.plot_display import PlotDisplay
 from sophys_live_view.widgets.run_selector import RunSelector
@@ -130,7 +131,10 @@ class SophysOperationGUI(QMainWindow):
             self.loginChanged = self.login.login_signal
             glay.addWidget(self.login, 0, 2, 1, 1)
 
-        controller = QueueController(self.model.run_engine, self.loginChanged)
+        controller = QueueController(
+            self.model.run_engine, self.loginChanged, server_model=self.model,
+            kafka_broker=KafkaDocumentBroker.getBroker(
+                self._kafka_ip, self._kafka_topic, self.model.startWorker))
         glay.addWidget(controller, 0, 0, 1, 3 if self.has_api_key else 2)
 
         vsplitter = QSplitter(Qt.Vertical)
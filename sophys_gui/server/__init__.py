@@ -1,2 +1,5 @@
 from .model import ServerModel
-from .kafka import KafkaDataRegister
\ No newline at end of file
+from .kafka import KafkaDataRegister, KafkaDocumentBroker
+from .catalog import PlanCatalog
+from .client import SophysManagerAPI
+from .snapshot import ServerSnapshot
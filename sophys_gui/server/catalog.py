@@ -0,0 +1,84 @@
+from sophys_gui.functions import parseParameter
+
+
+class PlanCatalog:
+    """
+        Cache of the allowed plans and instructions of the Queue Server,
+        indexed by item name and parameter name.
+
+        The parsed parameters are versioned by the allowed plans UID and
+        are discarded when the server sends a new list of allowed plans.
+    """
+
+    def __init__(self, run_engine):
+        self.run_engine = run_engine
+        self.version = None
+        self._parameters = {}
+        self.run_engine.events.allowed_plans_changed.connect(self.invalidate)
+
+    def invalidate(self, *_):
+        """
+            Discard the parsed parameters.
+        """
+        self.version = None
+
+    def updateVersion(self):
+        """
+            Discard the parsed parameters if the allowed plans changed.
+        """
+        version = self.run_engine._allowed_plans_uid
+        if version != self.version:
+            self._parameters = {}
+            self.version = version
+
+    def getVersion(self):
+        """
+            Get the allowed plans UID of the parsed parameters.
+        """
+        self.updateVersion()
+        return self.version
+
+    def getItem(self, item_type, name):
+        """
+            Get the allowed plan or instruction metadata, or None if
+            it is not allowed.
+        """
+        if item_type == "plan":
+            return self.run_engine._allowed_plans.get(name, None)
+        return self.run_engine._allowed_instructions.get(name, None)
+
+    def getParameters(self, item_type, name):
+        """
+            Get the parsed parameters of a plan or instruction,
+            indexed by the parameter name.
+        """
+        self.updateVersion()
+        key = (item_type, name)
+        if key not in self._parameters:
+            item = self.getItem(item_type, name) or {}
+            self._parameters[key] = {
+                paramMeta["name"]: parseParameter(paramMeta)
+                for paramMeta in item.get("parameters", [])
+            }
+        return self._parameters[key]
+
+    def getParameter(self, item_type, name, param_name):
+        """
+            Get the parsed metadata of a single parameter, or None if
+            the parameter does not exist.
+        """
+        return self.getParameters(item_type, name).get(param_name, None)
+
+    def getAllowedParameters(self, item_type):
+        """
+            Get a function that returns the metadata of an allowed item.
+        """
+        return lambda name: self.getItem(item_type, name)
+
+    def getAllowedNames(self, item_type):
+        """
+            Get a function that returns the names of the allowed items.
+        """
+        if item_type == "plan":
+            return lambda: list(self.run_engine._allowed_plans.keys())
+        return self.run_engine.get_allowed_instruction_names
@@ -0,0 +1,129 @@
+import time
+import threading
+from bluesky_queueserver_api.http import REManagerAPI
+
+
+class SophysManagerAPI(REManagerAPI):
+    """
+        HTTP client of the Queue Server that notifies the GUI
+        about the commands sent to the server and keeps the
+        login session alive.
+    """
+
+    READ_METHODS = (
+        "status", "ping", "queue_get", "history_get", "plans_allowed",
+        "devices_allowed", "re_runs", "console_output", "console_output_uid",
+        "console_output_update"
+    )
+    SESSION_METHODS = ("session_refresh", "logout", "whoami")
+
+    # Error names used by the RunEngineClient of bluesky-widgets
+    RequestError = REManagerAPI.HTTPRequestError
+    ClientError = REManagerAPI.HTTPClientError
+
+    # Longest time in seconds before the access token expires when it is refreshed
+    refresh_margin = 60
+
+    def __init__(self, *args, **kwargs):
+        self.token_expiration = None
+        self.token_refresh_time = None
+        self.session_changed = threading.Event()
+        self._session_lock = threading.RLock()
+        super().__init__(*args, **kwargs)
+        self.command_callbacks = []
+        self.response_callbacks = []
+
+    def set_authorization_key(self, **kwargs):
+        super().set_authorization_key(**kwargs)
+        self.token_expiration = None
+        self.token_refresh_time = None
+        self.session_changed.set()
+
+    def _process_login_response(self, response):
+        """
+            Save when the new access token expires and when it should be refreshed.
+        """
+        response = super()._process_login_response(response)
+        expires_in = response.get("expires_in", None)
+        if expires_in:
+            now = time.time()
+            self.token_expiration = now + expires_in
+            self.token_refresh_time = self.token_expiration - \
+                min(self.refresh_margin, expires_in / 5)
+        self.session_changed.set()
+        return response
+
+    def hasRefreshToken(self):
+        return self.auth_method == self.AuthorizationMethods.TOKEN and \
+            self.auth_key[1] is not None
+
+    def getRefreshDelay(self):
+        """
+            Get the time in seconds until the access token should be refreshed,
+            or None if it doesn't expire.
+        """
+        if self.token_refresh_time is None or not self.hasRefreshToken():
+            return None
+        return max(self.token_refresh_time - time.time(), 0)
+
+    def isTokenExpired(self):
+        if self.token_expiration is None or not self.hasRefreshToken():
+            return False
+        return time.time() >= self.token_expiration
+
+    def session_refresh(self, *, refresh_token=None):
+        with self._session_lock:
+            return super().session_refresh(refresh_token=refresh_token)
+
+    def refreshSession(self, token=None):
+        """
+            Get a new access token, unless another thread already replaced
+            the given one.
+        """
+        with self._session_lock:
+            if token is None or self.auth_key == token:
+                self.session_refresh()
+
+    def isCommand(self, method):
+        return isinstance(method, str) and \
+            method not in self.READ_METHODS and method not in self.SESSION_METHODS
+
+    def getEndpoint(self, method):
+        """
+            Get the HTTP method and the path of an API method.
+        """
+        if isinstance(method, str):
+            return self._rest_api_method_map[method]
+        return method
+
+    def send_request(self, *, method, auto_refresh_session=True, **kwargs):
+        if self.isCommand(method):
+            for callback in self.command_callbacks:
+                callback(method)
+        response = self.sendAuthorizedRequest(method, auto_refresh_session, **kwargs)
+        if self.response_callbacks:
+            http_method, endpoint = self.getEndpoint(method)
+            for callback in self.response_callbacks:
+                try:
+                    callback(http_method, endpoint, kwargs.get("params", None), response)
+                except Exception as e:
+                    print("Response callback failed:", e)
+        return response
+
+    def sendAuthorizedRequest(self, method, auto_refresh_session=True, **kwargs):
+        """
+            Send a request, refreshing the session if the access token expired.
+        """
+        if not auto_refresh_session:
+            return super().send_request(method=method, auto_refresh_session=False, **kwargs)
+
+        if self.isTokenExpired():
+            self.refreshSession(self.auth_key)
+        token = self.auth_key
+        try:
+            return super().send_request(method=method, auto_refresh_session=False, **kwargs)
+        except self.HTTPClientError as e:
+            if e.response.status_code != 401 or not self.hasRefreshToken():
+                raise
+        self.refreshSession(token)
+        return super().send_request(method=method, auto_refresh_session=False, **kwargs)
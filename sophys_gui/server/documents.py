@@ -0,0 +1,105 @@
+import msgpack
+import msgpack_numpy
+
+
+EVENT_KEYS = ("descriptor", "seq_num", "uid", "time")
+
+# Messages smaller than this are decoded at once, which is faster than walking them
+FULL_DECODING_SIZE = 262144
+
+
+def decodeDocument(message):
+    """
+        Decode a (name, document) message published by the Kafka callback of bluesky.
+    """
+    return msgpack_numpy.unpackb(message)
+
+
+# Size of the header and of the length field of the variable size msgpack types
+SIZED_TYPES = {
+    0xc4: (2, 1), 0xc5: (3, 2), 0xc6: (5, 4),
+    0xc7: (3, 1), 0xc8: (4, 2), 0xc9: (6, 4),
+    0xd9: (2, 1), 0xda: (3, 2), 0xdb: (5, 4),
+}
+FIXED_TYPES = {
+    0xc0: 1, 0xc2: 1, 0xc3: 1, 0xca: 5, 0xcb: 9,
+    0xcc: 2, 0xcd: 3, 0xce: 5, 0xcf: 9, 0xd0: 2, 0xd1: 3, 0xd2: 5, 0xd3: 9,
+    0xd4: 3, 0xd5: 4, 0xd6: 6, 0xd7: 10, 0xd8: 18,
+}
+CONTAINER_TYPES = {0xdc: (3, 1), 0xdd: (5, 1), 0xde: (3, 2), 0xdf: (5, 2)}
+
+
+def readContainer(buffer, offset):
+    """
+        Get the number of objects held by the array or map at the offset
+        and the offset of the first one.
+    """
+    head = buffer[offset]
+    if 0x80 <= head <= 0x9f:
+        size = 2 if head < 0x90 else 1
+        return (head & 0x0f) * size, offset + 1
+    if head not in CONTAINER_TYPES:
+        raise ValueError("Expected a msgpack array or map")
+    header, size = CONTAINER_TYPES[head]
+    length = int.from_bytes(buffer[offset + 1:offset + header], "big")
+    return length * size, offset + header
+
+
+def skipObject(buffer, offset):
+    """
+        Get the offset after the msgpack object at the offset, jumping over
+        binary and string payloads without copying them.
+    """
+    pending = 1
+    while pending > 0:
+        pending -= 1
+        head = buffer[offset]
+        if head <= 0x7f or head >= 0xe0:
+            offset += 1
+        elif head <= 0x9f or head in CONTAINER_TYPES:
+            count, offset = readContainer(buffer, offset)
+            pending += count
+        elif head <= 0xbf:
+            offset += 1 + (head & 0x1f)
+        elif head in FIXED_TYPES:
+            offset += FIXED_TYPES[head]
+        elif head in SIZED_TYPES:
+            header, size = SIZED_TYPES[head]
+            length = int.from_bytes(buffer[offset + 1:offset + 1 + size], "big")
+            offset += header + length
+        else:
+            raise ValueError("Invalid msgpack type 0x{:x}".format(head))
+    return offset
+
+
+def decodeDocumentHeader(message, keys=EVENT_KEYS):
+    """
+        Decode the name of a message and, for events, only the given keys of the
+        document. The data and timestamps of the events are skipped without being
+        copied, so the cost doesn't depend on the size of the detector readings.
+    """
+    if len(message) < FULL_DECODING_SIZE:
+        name, document = decodeDocument(message)
+        if name == "event":
+            document = {key: document[key] for key in keys if key in document}
+        return name, document
+
+    buffer = memoryview(message)
+    count, offset = readContainer(buffer, 0)
+    if count != 2:
+        raise ValueError("Invalid document message")
+    end = skipObject(buffer, offset)
+    name = msgpack.unpackb(buffer[offset:end], raw=False)
+    if name != "event":
+        return name, msgpack_numpy.unpackb(buffer[end:])
+
+    document = {}
+    count, offset = readContainer(buffer, end)
+    for _ in range(count // 2):
+        end = skipObject(buffer, offset)
+        key = msgpack.unpackb(buffer[offset:end], raw=False)
+        offset, end = end, skipObject(buffer, end)
+        if key in keys:
+            document[key] = msgpack.unpackb(buffer[offset:end], raw=False)
+        offset = end
+    return name, document
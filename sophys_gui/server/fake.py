@@ -0,0 +1,582 @@
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeHTTPServer(ABC):
+    """
+        Base of the in-process HTTP servers that stand in for the Queue Server.
+        Subclasses answer the requests in handle().
+    """
+
+    httpd = None
+    thread = None
+
+    @property
+    def uri(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+            Serve the API from a background thread and return the server URI.
+        """
+        server = self
+
+        class Handler(FakeRequestHandler):
+            fake_server = server
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self.thread.start()
+        return self.uri
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.thread.join()
+            self.httpd = None
+
+    @abstractmethod
+    def handle(self, method, path, params, headers):
+        """
+            Answer a request with an HTTP status code and a JSON response.
+        """
+
+
+class FakeQueueServer(FakeHTTPServer):
+    """
+        In-process stand-in for the Queue Server HTTP API with synthetic state,
+        used for testing the GUI offline and for scale and latency measurements.
+
+        The queue is executed in simulated time: once started, each item runs for
+        plan_duration seconds and then moves to the history.
+    """
+
+    def __init__(self, queue_size=10, history_size=100, plan_count=20, device_count=50,
+                 latency=0.0, jitter=0.0, failure_rate=0.0, plan_duration=5.0,
+                 token_lifetime=900, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.plan_duration = plan_duration
+        self.token_lifetime = token_lifetime
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+
+        self.plans_allowed = self.createPlans(plan_count)
+        self.devices_allowed = self.createDevices(device_count)
+        self.queue = [self.createItem() for _ in range(queue_size)]
+        self.history = [self.createHistoryItem(self.createItem()) for _ in range(history_size)]
+        self.running_item = {}
+        self.running_end = None
+        self.console = []
+        self.tokens = {}
+        self.manager_state = "idle"
+        self.environment_exists = False
+        self.stop_pending = False
+        self.loop = False
+        self.uids = {
+            "plan_queue_uid": self.newUid(), "plan_history_uid": self.newUid(),
+            "run_list_uid": self.newUid(), "plans_allowed_uid": self.newUid(),
+            "devices_allowed_uid": self.newUid()
+        }
+        self.routes = {
+            ("GET", "/api/ping"): self.getStatus,
+            ("GET", "/api/status"): self.getStatus,
+            ("GET", "/api/queue/get"): self.getQueue,
+            ("GET", "/api/history/get"): self.getHistory,
+            ("GET", "/api/plans/allowed"): self.getPlansAllowed,
+            ("GET", "/api/devices/allowed"): self.getDevicesAllowed,
+            ("GET", "/api/console_output_update"): self.getConsoleOutput,
+            ("POST", "/api/re/runs"): self.getRuns,
+            ("POST", "/api/queue/item/add"): self.addItem,
+            ("POST", "/api/queue/item/add/batch"): self.addItemBatch,
+            ("POST", "/api/queue/item/update"): self.updateItem,
+            ("POST", "/api/queue/item/remove"): self.removeItem,
+            ("POST", "/api/queue/item/remove/batch"): self.removeItemBatch,
+            ("POST", "/api/queue/item/move"): self.moveItem,
+            ("POST", "/api/queue/item/move/batch"): self.moveItemBatch,
+            ("POST", "/api/queue/clear"): self.clearQueue,
+            ("POST", "/api/history/clear"): self.clearHistory,
+            ("POST", "/api/queue/start"): self.startQueue,
+            ("POST", "/api/queue/stop"): self.stopQueue,
+            ("POST", "/api/queue/stop/cancel"): self.cancelStopQueue,
+            ("POST", "/api/queue/mode/set"): self.setQueueMode,
+            ("POST", "/api/re/pause"): self.pause,
+            ("POST", "/api/re/resume"): self.resume,
+            ("POST", "/api/re/stop"): self.abort,
+            ("POST", "/api/re/abort"): self.abort,
+            ("POST", "/api/re/halt"): self.abort,
+            ("POST", "/api/environment/open"): self.openEnvironment,
+            ("POST", "/api/environment/close"): self.closeEnvironment,
+            ("POST", "/api/environment/destroy"): self.closeEnvironment,
+            ("POST", "/api/permissions/reload"): self.succeed,
+            ("POST", "/api/auth/session/refresh"): self.refreshSession,
+            ("POST", "/api/auth/logout"): self.logout,
+            ("GET", "/api/auth/whoami"): self.whoami,
+        }
+
+    def newUid(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def createPlans(self, count):
+        """
+            Create a catalog of plans with a detector list, a motor and a few
+            numeric and optional parameters.
+        """
+        parameters = [
+            {"name": "detectors", "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+             "annotation": {"type": "typing.List[__READABLE__]"},
+             "description": "Detectors to read."},
+            {"name": "motor", "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+             "annotation": {"type": "__MOVABLE__"}, "description": "Motor to scan."},
+            {"name": "start", "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+             "annotation": {"type": "float"}, "description": "Start position."},
+            {"name": "stop", "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+             "annotation": {"type": "float"}, "description": "Stop position."},
+            {"name": "num", "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+             "annotation": {"type": "int"}, "description": "Number of points."},
+            {"name": "md", "kind": {"name": "KEYWORD_ONLY", "value": 3},
+             "annotation": {"type": "typing.Optional[dict]"}, "default": "None",
+             "description": "Metadata of the run."},
+        ]
+        plans = {}
+        for index in range(count):
+            name = "fake_scan_{}".format(index)
+            plans[name] = {
+                "name": name, "module": "sophys_gui.fake",
+                "description": "Synthetic plan number {}.".format(index),
+                "parameters": parameters
+            }
+        return plans
+
+    def createDevices(self, count):
+        devices = {}
+        for index in range(count):
+            isMotor = index % 2 == 0
+            name = "{}{}".format("motor" if isMotor else "det", index)
+            devices[name] = {
+                "classname": "EpicsMotor" if isMotor else "EpicsSignalRO",
+                "is_movable": isMotor, "is_readable": True, "is_flyable": False,
+                "module": "ophyd"
+            }
+        return devices
+
+    def createItem(self):
+        name = self.random.choice(list(self.plans_allowed)) if self.plans_allowed else "count"
+        return {
+            "item_uid": self.newUid(), "item_type": "plan", "name": name,
+            "args": [["det1"], "motor0", 0, self.random.uniform(1, 10), self.random.randint(2, 50)],
+            "kwargs": {}, "user": "fake", "user_group": "primary"
+        }
+
+    def createHistoryItem(self, item, exit_status="completed"):
+        now = time.time()
+        result = {
+            "exit_status": exit_status, "run_uids": [self.newUid()],
+            "scan_ids": [self.random.randint(1, 10**6)],
+            "time_start": now - self.plan_duration, "time_stop": now,
+            "msg": "", "traceback": "Traceback: fake failure" if exit_status == "failed" else ""
+        }
+        return dict(item, result=result)
+
+    def changed(self, *keys):
+        for key in keys:
+            self.uids[key] = self.newUid()
+
+    def log(self, message):
+        self.console.append({"time": time.time(), "msg": message + "\n", "uid": self.newUid()})
+        del self.console[:-1000]
+
+    def tick(self):
+        """
+            Advance the simulated queue execution to the current time.
+        """
+        now = time.time()
+        while self.manager_state == "executing_queue" and self.running_end is not None \
+                and now >= self.running_end:
+            item = self.running_item
+            end = self.running_end
+            self.history.append(self.createHistoryItem(item))
+            self.log("Finished plan {} ({})".format(item["name"], item["item_uid"]))
+            if self.loop:
+                self.queue.append(dict(item, item_uid=self.newUid()))
+            self.running_item = {}
+            self.running_end = None
+            self.changed("plan_queue_uid", "plan_history_uid", "run_list_uid")
+            if self.stop_pending or not self.queue:
+                self.manager_state = "idle"
+                self.stop_pending = False
+            else:
+                self.runNext(end)
+
+    def runNext(self, start):
+        self.running_item = self.queue.pop(0)
+        self.running_end = start + self.plan_duration
+        self.log("Started plan {} ({})".format(
+            self.running_item["name"], self.running_item["item_uid"]))
+        self.changed("plan_queue_uid", "run_list_uid")
+
+    def handle(self, method, path, params, headers):
+        if self.latency or self.jitter:
+            time.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            return 500, {"detail": "Injected failure"}
+        if path.startswith("/api/auth/provider/") and method == "POST":
+            return 200, self.login()
+        route = self.routes.get((method, path), None)
+        if route is None:
+            return 404, {"detail": "Not Found"}
+        if path != "/api/auth/session/refresh" and \
+                not self.isAuthorized(headers.get("Authorization", "")):
+            return 401, {"detail": "Access token has expired"}
+        with self.lock:
+            self.tick()
+            return 200, route(params)
+
+    def isAuthorized(self, authorization):
+        if not authorization.startswith("Bearer "):
+            return True
+        expiration = self.tokens.get(authorization[len("Bearer "):], 0)
+        return time.time() < expiration
+
+    def login(self):
+        token = self.newUid()
+        self.tokens[token] = time.time() + self.token_lifetime
+        return {
+            "access_token": token, "refresh_token": self.newUid(), "token_type": "bearer",
+            "expires_in": self.token_lifetime, "refresh_token_expires_in": 10 * self.token_lifetime
+        }
+
+    def refreshSession(self, params):
+        return self.login()
+
+    def logout(self, params):
+        return {}
+
+    def whoami(self, params):
+        return {"identities": [{"id": "fake", "provider": "fake"}], "roles": ["admin"]}
+
+    def succeed(self, params=None, **response):
+        return dict({"success": True, "msg": ""}, **response)
+
+    def fail(self, msg):
+        return {"success": False, "msg": msg}
+
+    def getStatus(self, params):
+        return dict(
+            self.uids, msg="RE Manager (fake)", manager_state=self.manager_state,
+            items_in_queue=len(self.queue), items_in_history=len(self.history),
+            running_item_uid=self.running_item.get("item_uid", None),
+            worker_environment_exists=self.environment_exists,
+            worker_environment_state="idle" if self.environment_exists else "closed",
+            re_state="running" if self.running_item else "idle" if self.environment_exists else None,
+            queue_stop_pending=self.stop_pending, queue_autostart_enabled=False,
+            plan_queue_mode={"loop": self.loop, "ignore_failures": False},
+            pause_pending=False, lock_info_uid=None, task_results_uid=None)
+
+    def getQueue(self, params):
+        return self.succeed(
+            items=self.queue, running_item=self.running_item,
+            plan_queue_uid=self.uids["plan_queue_uid"])
+
+    def getHistory(self, params):
+        return self.succeed(items=self.history, plan_history_uid=self.uids["plan_history_uid"])
+
+    def getPlansAllowed(self, params):
+        return self.succeed(
+            plans_allowed=self.plans_allowed, plans_allowed_uid=self.uids["plans_allowed_uid"])
+
+    def getDevicesAllowed(self, params):
+        return self.succeed(
+            devices_allowed=self.devices_allowed,
+            devices_allowed_uid=self.uids["devices_allowed_uid"])
+
+    def getRuns(self, params):
+        return self.succeed(run_list=[], run_list_uid=self.uids["run_list_uid"])
+
+    def getConsoleOutput(self, params):
+        last_uid = params.get("last_msg_uid", "")
+        uids = [msg["uid"] for msg in self.console]
+        first = uids.index(last_uid) + 1 if last_uid in uids else 0
+        msgs = [{"time": msg["time"], "msg": msg["msg"]} for msg in self.console[first:]]
+        last = self.console[-1]["uid"] if self.console else ""
+        return self.succeed(console_output_msgs=msgs, last_msg_uid=last)
+
+    def getPosition(self, params, uids=()):
+        """
+            Get the insertion index for pos, before_uid or after_uid, ignoring the
+            items that are being moved.
+        """
+        keys = [item["item_uid"] for item in self.queue if item["item_uid"] not in uids]
+        if "before_uid" in params:
+            return keys.index(params["before_uid"])
+        if "after_uid" in params:
+            return keys.index(params["after_uid"]) + 1
+        pos = params.get("pos", params.get("pos_dest", "back"))
+        if pos == "front":
+            return 0
+        if pos == "back":
+            return len(keys)
+        return pos if pos >= 0 else len(keys) + pos + 1
+
+    def getItemIndex(self, params):
+        if "uid" in params:
+            keys = [item["item_uid"] for item in self.queue]
+            return keys.index(params["uid"])
+        pos = params.get("pos", "back")
+        return {"front": 0, "back": len(self.queue) - 1}.get(pos, pos)
+
+    def insertItems(self, items, params):
+        newItems = []
+        for item in items:
+            item = dict(item, item_uid=self.newUid())
+            item.pop("result", None)
+            item.setdefault("user", params.get("user", "fake"))
+            item.setdefault("user_group", params.get("user_group", "primary"))
+            newItems.append(item)
+        index = self.getPosition(params)
+        self.queue[index:index] = newItems
+        self.changed("plan_queue_uid")
+        return newItems
+
+    def addItem(self, params):
+        try:
+            item = self.insertItems([params["item"]], params)[0]
+        except (KeyError, ValueError) as e:
+            return self.fail("Failed to add the item: {}".format(e))
+        return self.succeed(qsize=len(self.queue), item=item)
+
+    def addItemBatch(self, params):
+        try:
+            items = self.insertItems(params["items"], params)
+        except (KeyError, ValueError) as e:
+            return self.fail("Failed to add the batch of items: {}".format(e))
+        results = [{"success": True, "msg": ""} for _ in items]
+        return self.succeed(qsize=len(self.queue), items=items, results=results)
+
+    def updateItem(self, params):
+        item = params.get("item", {})
+        keys = [queueItem["item_uid"] for queueItem in self.queue]
+        if item.get("item_uid", None) not in keys:
+            return self.fail("Item with UID {} is not in the queue".format(item.get("item_uid")))
+        index = keys.index(item["item_uid"])
+        if not params.get("replace", False):
+            item = dict(item)
+        else:
+            item = dict(item, item_uid=self.newUid())
+        self.queue[index] = item
+        self.changed("plan_queue_uid")
+        return self.succeed(qsize=len(self.queue), item=item)
+
+    def removeItem(self, params):
+        try:
+            item = self.queue.pop(self.getItemIndex(params))
+        except (ValueError, IndexError, TypeError):
+            return self.fail("Item {} is not in the queue".format(params))
+        self.changed("plan_queue_uid")
+        return self.succeed(qsize=len(self.queue), item=item)
+
+    def removeItemBatch(self, params):
+        uids = params.get("uids", [])
+        keys = set(item["item_uid"] for item in self.queue)
+        missing = [uid for uid in uids if uid not in keys]
+        if missing:
+            return self.fail("Items {} are not in the queue".format(missing))
+        items = [item for item in self.queue if item["item_uid"] in uids]
+        self.queue = [item for item in self.queue if item["item_uid"] not in uids]
+        self.changed("plan_queue_uid")
+        return self.succeed(qsize=len(self.queue), items=items)
+
+    def moveItem(self, params):
+        try:
+            item = self.queue[self.getItemIndex(params)]
+            return self.moveItems([item["item_uid"]], params, single=True)
+        except (ValueError, IndexError, TypeError):
+            return self.fail("Item {} is not in the queue".format(params))
+
+    def moveItemBatch(self, params):
+        return self.moveItems(params.get("uids", []), params)
+
+    def moveItems(self, uids, params, single=False):
+        byUid = {item["item_uid"]: item for item in self.queue}
+        if any(uid not in byUid for uid in uids):
+            return self.fail("Some of the items are not in the queue")
+        ref = params.get("before_uid", params.get("after_uid", None))
+        if ref is not None and (ref in uids or ref not in byUid):
+            return self.fail("Invalid reference item {}".format(ref))
+        try:
+            index = self.getPosition(params, uids)
+        except (ValueError, TypeError) as e:
+            return self.fail("Invalid destination: {}".format(e))
+        moved = [byUid[uid] for uid in uids]
+        others = [item for item in self.queue if item["item_uid"] not in uids]
+        others[index:index] = moved
+        self.queue = others
+        self.changed("plan_queue_uid")
+        if single:
+            return self.succeed(qsize=len(self.queue), item=moved[0])
+        return self.succeed(qsize=len(self.queue), items=moved)
+
+    def clearQueue(self, params):
+        self.queue = []
+        self.changed("plan_queue_uid")
+        return self.succeed()
+
+    def clearHistory(self, params):
+        self.history = []
+        self.changed("plan_history_uid")
+        return self.succeed()
+
+    def startQueue(self, params):
+        if not self.environment_exists:
+            return self.fail("RE Worker environment does not exist")
+        if self.manager_state != "idle":
+            return self.fail("RE Manager is busy")
+        if not self.queue:
+            return self.fail("The queue is empty")
+        self.manager_state = "executing_queue"
+        self.runNext(time.time())
+        return self.succeed()
+
+    def stopQueue(self, params):
+        if self.manager_state != "executing_queue":
+            return self.fail("The queue is not running")
+        self.stop_pending = True
+        return self.succeed()
+
+    def cancelStopQueue(self, params):
+        self.stop_pending = False
+        return self.succeed()
+
+    def setQueueMode(self, params):
+        self.loop = params.get("mode", {}).get("loop", self.loop)
+        return self.succeed()
+
+    def pause(self, params):
+        if self.manager_state != "executing_queue":
+            return self.fail("The queue is not running")
+        self.manager_state = "paused"
+        self.running_end = self.running_end - time.time()
+        return self.succeed()
+
+    def resume(self, params):
+        if self.manager_state != "paused":
+            return self.fail("The queue is not paused")
+        self.manager_state = "executing_queue"
+        self.running_end = time.time() + self.running_end
+        return self.succeed()
+
+    def abort(self, params):
+        if self.manager_state != "paused":
+            return self.fail("The queue is not paused")
+        self.history.append(self.createHistoryItem(self.running_item, "aborted"))
+        self.running_item = {}
+        self.running_end = None
+        self.manager_state = "idle"
+        self.changed("plan_queue_uid", "plan_history_uid", "run_list_uid")
+        return self.succeed()
+
+    def openEnvironment(self, params):
+        if self.environment_exists:
+            return self.fail("RE Worker environment already exists")
+        self.environment_exists = True
+        self.log("Opened the RE Worker environment")
+        return self.succeed()
+
+    def closeEnvironment(self, params):
+        if self.manager_state != "idle":
+            return self.fail("RE Manager is busy")
+        self.environment_exists = False
+        self.log("Closed the RE Worker environment")
+        return self.succeed()
+
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+    """
+        HTTP handler that forwards the requests to the fake server.
+    """
+
+    fake_server = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def readParams(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if not body:
+            return {}
+        try:
+            params = json.loads(body)
+        except ValueError:
+            return {}
+        return params if isinstance(params, dict) else {}
+
+    def respond(self, method):
+        path = self.path.split("?")[0]
+        code, response = self.fake_server.handle(
+            method, path, self.readParams(), self.headers)
+        body = json.dumps(response).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def do_POST(self):
+        self.respond("POST")
+
+    def do_DELETE(self):
+        self.respond("DELETE")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fake Queue Server HTTP API for testing the GUI offline.")
+    parser.add_argument("--host", default="127.0.0.1", help="The address to listen to.")
+    parser.add_argument("--port", type=int, default=60610, help="The port to listen to.")
+    parser.add_argument("--queue-size", type=int, default=10, help="Number of items in the queue at startup.")
+    parser.add_argument("--history-size", type=int, default=100, help="Number of items in the history at startup.")
+    parser.add_argument("--plans", type=int, default=20, help="Number of allowed plans.")
+    parser.add_argument("--devices", type=int, default=50, help="Number of allowed devices.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay in seconds added to every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random delay in seconds added on top of the latency.")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of the requests answered with a server error.")
+    parser.add_argument("--plan-duration", type=float, default=5.0, help="Simulated run time of each queue item, in seconds.")
+    parser.add_argument("--token-lifetime", type=int, default=900, help="Lifetime of the login access tokens, in seconds.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the synthetic state and of the injected failures.")
+    parser.add_argument("--replay", default=None, help="Answer with the responses of a trace recorded with sophys-gui --record-trace instead of the synthetic state.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed of the trace, e.g. 60 replays an hour in a minute.")
+    args = parser.parse_args()
+
+    if args.replay:
+        from .trace import TraceReplay
+        server = TraceReplay(args.replay, args.speed)
+    else:
+        server = FakeQueueServer(
+            args.queue_size, args.history_size, args.plans, args.devices, args.latency,
+            args.jitter, args.failure_rate, args.plan_duration, args.token_lifetime, args.seed)
+    uri = server.start(args.host, args.port)
+    print("Fake Queue Server listening on", uri)
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
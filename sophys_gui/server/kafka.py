@@ -1,38 +1,311 @@
+import time
 import threading
-from queue import Queue
-import msgpack_numpy
+from collections import deque
+from qtpy.QtCore import QObject, Signal
 from kafka import KafkaConsumer
+from .documents import decodeDocument, decodeDocumentHeader
 
 
-class KafkaDataRegister():
-    
-    def __init__(self, kafka_uri, kafka_topic):
+def startThread(name, target, stop=None):
+    """
+        Start a daemon thread, for when there is no server model to register it in.
+    """
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class KafkaSubscription():
+    """
+        Bounded queue of the documents published to a subscriber of a
+        KafkaDocumentBroker. When it is full the oldest document is dropped.
+    """
+
+    def __init__(self, broker, maxsize=1000, full_documents=False):
+        self.broker = broker
+        self.full_documents = full_documents
+        self.documents = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, document):
+        with self.condition:
+            if len(self.documents) == self.documents.maxlen:
+                self.dropped += 1
+            self.documents.append(document)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """
+            Get the oldest queued (name, document) pair, waiting for one to arrive.
+            Returns None on timeout or if the subscription was closed.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.documents or self.closed, timeout)
+            if not self.documents:
+                return None
+            return self.documents.popleft()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class KafkaDocumentBroker(QObject):
+    """
+        Single consumer of a Kafka topic that decodes each document once and
+        publishes it to every subscriber in this process.
+
+        Documents are only fully decoded while a subscriber asks for them,
+        otherwise only the header of the events is decoded.
+
+        The broker connects on a background thread and retries with an
+        exponential backoff while Kafka is unreachable, emitting
+        connectionChanged whenever the connection is made or lost. As
+        kafka-python reconnects inside poll() without raising, the brokers
+        are asked for the end offsets of the topic while no message arrives.
+
+        The thread is started with startWorker(name, target, stop), usually
+        ServerModel.startWorker, so it is stopped and joined on exit.
+    """
+
+    connectionChanged = Signal(bool)
+
+    brokers = {}
+    brokers_lock = threading.Lock()
+
+    # Shortest and longest time in seconds between connection attempts
+    retry_floor = 1.0
+    retry_ceiling = 60.0
+    # Time in seconds without messages before checking if the brokers still answer,
+    # and the longest time the check, or the first partition assignment, can take
+    liveness_interval = 5.0
+    liveness_timeout = 5.0
+
+    def __init__(self, kafka_uri, kafka_topic, startWorker=startThread):
+        super().__init__()
+        self.kafka_uri = kafka_uri
+        self.kafka_topic = kafka_topic
+        self.startWorker = startWorker
+        self.subscriptions = []
+        self.lock = threading.Lock()
+        self.connected = False
+        self.thread = None
+        self.__stop = threading.Event()
+
+    @classmethod
+    def getBroker(cls, kafka_uri, kafka_topic, startWorker=startThread):
+        """
+            Get the broker shared by everyone listening to a topic. The
+            startWorker of the first call starts its thread.
+        """
+        with cls.brokers_lock:
+            key = (kafka_uri, kafka_topic)
+            if key not in cls.brokers:
+                cls.brokers[key] = cls(kafka_uri, kafka_topic, startWorker)
+            return cls.brokers[key]
+
+    def subscribe(self, maxsize=1000, full_documents=False):
+        """
+            Create a queue that receives the documents published from now on.
+        """
+        subscription = KafkaSubscription(self, maxsize, full_documents)
+        with self.lock:
+            self.subscriptions = self.subscriptions + [subscription]
+        self.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = [
+                item for item in self.subscriptions if item is not subscription]
+
+    def start(self):
+        """
+            Start connecting to Kafka in the background, if not started yet.
+        """
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = self.startWorker(
+                "kafka " + self.kafka_topic, self.run, self.stop)
+
+    def stop(self):
+        """
+            Stop consuming, closing the consumer, and close every subscription.
+        """
+        self.__stop.set()
+        for subscription in self.subscriptions:
+            subscription.close()
+
+    def setConnected(self, connected):
+        if connected != self.connected:
+            self.connected = connected
+            self.connectionChanged.emit(connected)
+
+    def createConsumer(self):
+        """
+            Create a consumer of the topic, or return None if Kafka is unreachable.
+        """
+        try:
+            return KafkaConsumer(
+                self.kafka_topic,
+                bootstrap_servers=[self.kafka_uri])
+        except Exception as e:
+            print("Couldn't connect to Kafka:", e)
+            return None
+
+    def run(self):
+        delay = self.retry_floor
+        while not self.__stop.is_set():
+            consumer = self.createConsumer()
+            if consumer is not None:
+                try:
+                    self.monitor(consumer)
+                except Exception as e:
+                    print("Lost the connection to Kafka:", e)
+                finally:
+                    consumer.close()
+                if self.connected:
+                    delay = self.retry_floor
+                self.setConnected(False)
+            self.__stop.wait(delay)
+            delay = min(delay * 2, self.retry_ceiling)
+
+    def isReachable(self, consumer, elapsed):
+        """
+            Check if the brokers of the assigned partitions answer, raising if they
+            don't. Returns False while the partitions are not assigned yet, and
+            raises if that takes longer than liveness_timeout.
+        """
+        partitions = consumer.assignment()
+        if not partitions:
+            if elapsed > self.liveness_timeout:
+                raise ConnectionError(
+                    "No partition of {} was assigned".format(self.kafka_topic))
+            return False
+        consumer.end_offsets(list(partitions), timeout_ms=int(self.liveness_timeout * 1000))
+        return True
+
+    def monitor(self, consumer):
+        start = time.monotonic()
+        last_check = None
+        while not self.__stop.is_set():
+            records = consumer.poll(timeout_ms=500)
+            for messages in records.values():
+                for message in messages:
+                    self.publish(message)
+            now = time.monotonic()
+            if records:
+                last_check = now
+                self.setConnected(True)
+            elif last_check is None or now - last_check >= self.liveness_interval:
+                if self.isReachable(consumer, now - start):
+                    last_check = now
+                    self.setConnected(True)
+
+    def publish(self, message):
+        subscriptions = self.subscriptions
+        if not subscriptions:
+            return
+        if any(subscription.full_documents for subscription in subscriptions):
+            document = decodeDocument(message.value)
+        else:
+            document = decodeDocumentHeader(message.value)
+        for subscription in subscriptions:
+            subscription.put(document)
+
+
+class KafkaDataRegister(QObject):
+    """
+        Keeps the progress of the latest runs published to a Kafka topic: the
+        latest start document, the latest primary stream seq_num and the count
+        of primary events since the last reset.
+
+        progressChanged is emitted when the progress changes, once until the
+        state is read again with get_state.
+    """
+
+    progressChanged = Signal()
+
+    def __init__(self, kafka_uri, kafka_topic, startWorker=startThread):
+        super().__init__()
         self.kafka_topic = kafka_topic
         self.kafka_uri = kafka_uri
         self.primary_uid = ""
-        self.queue = Queue()
-        consumer = KafkaConsumer(
-            self.kafka_topic,
-            bootstrap_servers=[self.kafka_uri])
-        if consumer.bootstrap_connected():
-            kafka_thread = threading.Thread(target=self.monitor, args=(consumer, ), daemon=True)
-            kafka_thread.start()
+        self.lock = threading.Lock()
+        self.revision = 0
+        self.notified = False
+        self.reset()
+        broker = KafkaDocumentBroker.getBroker(kafka_uri, kafka_topic, startWorker)
+        self.subscription = broker.subscribe()
+        startWorker("kafka progress", self.monitor, self.subscription.close)
 
-    def monitor(self, consumer):
-        for message in consumer:
-            kafka_msg = msgpack_numpy.unpackb(message.value)
+    def reset(self):
+        """
+            Forget the runs received so far.
+        """
+        with self.lock:
+            self.metadata = {}
+            self.seq_num = 0
+            self.run_seq_num = 0
+            self.event_count = 0
+            self.revision += 1
+        self.notifyProgress()
+
+    def monitor(self):
+        while True:
+            kafka_msg = self.subscription.get()
+            if kafka_msg is None:
+                return
             if kafka_msg[0] == "start":
-                self.queue.put(kafka_msg[1])
+                with self.lock:
+                    self.metadata = kafka_msg[1]
+                    self.run_seq_num = 0
+                    self.revision += 1
+                self.notifyProgress()
             elif kafka_msg[0] == "descriptor":
                 if kafka_msg[1]["name"] == "primary":
                     self.primary_uid = kafka_msg[1]["uid"]
             elif kafka_msg[0] == "event":
                 if "descriptor" in kafka_msg[1]:
                     if self.primary_uid == kafka_msg[1]["descriptor"]:
-                        self.queue.put(kafka_msg[1])
+                        self.updateProgress(kafka_msg[1].get("seq_num", None))
+
+    def updateProgress(self, seq_num):
+        if seq_num is None:
+            return
+        with self.lock:
+            if seq_num > self.run_seq_num:
+                self.event_count += seq_num - self.run_seq_num
+            self.run_seq_num = seq_num
+            self.seq_num = seq_num
+            self.revision += 1
+        self.notifyProgress()
+
+    def notifyProgress(self):
+        """
+            Emit progressChanged unless the previous change wasn't read yet.
+        """
+        with self.lock:
+            if self.notified:
+                return
+            self.notified = True
+        self.progressChanged.emit()
 
-    def get_data(self):
-        kafka_data = []
-        while not self.queue.empty():
-            kafka_data.append(self.queue.get(block=False))
-        return kafka_data
\ No newline at end of file
+    def get_state(self):
+        """
+            Get the start document of the latest run, the latest seq_num, the
+            count of events of all the runs and the revision of this state.
+        """
+        with self.lock:
+            self.notified = False
+            return {
+                "metadata": self.metadata,
+                "seq_num": self.seq_num,
+                "event_count": self.event_count,
+                "revision": self.revision
+            }
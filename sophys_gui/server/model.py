@@ -1,10 +1,16 @@
-import sys
 import time
+import threading
 
-from functools import partial
-from bluesky_queueserver_api import WaitMonitor
+from functools import wraps
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from queue import Queue
 from bluesky_widgets.models.run_engine_client import RunEngineClient
-from suitscase.utilities.threading import AsyncFunction
+from suitscase.utilities.threading import DeferredFunction
+from .catalog import PlanCatalog
+from .client import SophysManagerAPI
+from .snapshot import ServerSnapshot
+from .trace import TraceRecorder
 
 
 class ServerModel:
@@ -12,51 +18,393 @@ class ServerModel:
         Class for monitoring and communicating with the Bluesky Run Engine.
     """
 
-    def __init__(self, http_server_uri, api_key=None):
+    # Time after a command during which the status is polled at the floor rate
+    command_burst = 5.0
+    # Clock of the status polling, replaceable in tests
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, http_server_uri, api_key=None, poll_floor=0.2, poll_ceiling=5.0,
+                 cache_path=None, trace_path=None):
         """
             Start the Run Engine client and monitor some aspects of it.
+
+            The state saved by the last session is shown right away, marked as stale,
+            and reconciled with the server by the monitor thread. If trace_path is
+            given, every response of the server is recorded to it.
         """
+        self.run_engine = RunEngineClient(
+            http_server_uri=http_server_uri
+        )
+        client = SophysManagerAPI(http_server_uri=http_server_uri)
         if api_key is not None:
-            self.run_engine = RunEngineClient(
-                http_server_uri=http_server_uri,
-                http_server_api_key=api_key
-            )
-        else:
-            self.run_engine = RunEngineClient(
-                http_server_uri=http_server_uri
-            )
-            
-        self.server_callback(
-            lambda status: status["plan_queue_uid"] != self.run_engine._plan_queue_uid,
-            self.run_engine.manager_connecting_ops)
-        self.server_callback(
-            lambda status: status["plan_queue_mode"] != self.run_engine.events.status_changed,
-            partial(self.run_engine.load_re_manager_status, unbuffered=True))
-
-    def exit(self):
-        """
-            Stop monitoring the Run Engine.
-        """
-        self.__server_monitor.cancel()
-        while self.__monitoring_server:
-            time.sleep(0.01)
-
-    @AsyncFunction
-    def server_callback(self, param, cmd):
-        """
-            Callback function that updates the local Run Engine.
-        """
-        def monitor_server_changes():
-            self.__monitoring_server = True
-            self.__server_monitor = WaitMonitor()
-            while True:
+            client.set_authorization_key(api_key=api_key)
+        client.command_callbacks.append(self.onCommandSent)
+        self.recorder = None
+        if trace_path is not None:
+            self.recorder = TraceRecorder(trace_path)
+            client.response_callbacks.append(self.recorder.record)
+        self.run_engine._client.close()
+        self.run_engine._client = client
+        self._reload_lock = threading.RLock()
+        self.guardReloads()
+        self.catalog = PlanCatalog(self.run_engine)
+        self.status = None
+        self.poll_floor = poll_floor
+        self.poll_ceiling = max(poll_ceiling, poll_floor)
+        self.poll_interval = poll_floor
+        self._last_command_time = 0
+        self.__wake_monitor = threading.Event()
+        self._workers = {}
+        self._workers_lock = threading.Lock()
+        self.exiting = False
+        self._command_lanes = {}
+        self._command_lanes_lock = threading.Lock()
+        self._subscriptions = {}
+        self._subscription_ids = count()
+        self._subscriptions_lock = threading.Lock()
+        self.__stop_monitor = threading.Event()
+        self.__stop_session = threading.Event()
+
+        self.subscribe(
+            lambda status: status is not None and \
+                status["plan_queue_uid"] != self.run_engine._plan_queue_uid,
+            lambda status: self.run_engine.manager_connecting_ops(),
+            gui_thread=False)
+        self.subscribe(
+            self.hasStatusChanged,
+            lambda status: self.run_engine.load_re_manager_status(unbuffered=True),
+            gui_thread=False)
+        self.snapshot = ServerSnapshot(
+            cache_path or ServerSnapshot.getDefaultPath(http_server_uri))
+        self.stale = self.restoreSnapshot()
+        if not self.stale:
+            self.warmUp()
+        self.startWorker("status monitor", self.monitor_server, self.stopMonitor)
+        self.startWorker("session refresh", self.keepSessionAlive, self.stopSession)
+
+    def restoreSnapshot(self):
+        """
+            Fill the Run Engine caches with the snapshot saved by the last session.
+            Returns True if a snapshot was restored.
+        """
+        snapshot = self.snapshot.load()
+        if snapshot is None:
+            return False
+        try:
+            self.snapshot.restore(self.run_engine, snapshot)
+        except Exception as e:
+            print("Couldn't restore the server snapshot:", e)
+            return False
+        return True
+
+    def saveSnapshot(self):
+        """
+            Save the Run Engine caches for the next session.
+        """
+        self.snapshot.save(self.snapshot.capture(self.run_engine))
+
+    def guardReloads(self):
+        """
+            Make the Run Engine client reloads, including the ones it runs after
+            each command, hold the reload lock. The client is not thread-safe, so
+            the monitor and the command lanes must never update its caches at once.
+        """
+        for name in ("load_re_manager_status", "manager_connecting_ops"):
+            load = getattr(self.run_engine, name)
+            setattr(self.run_engine, name, self.holdReloadLock(load))
+
+    def holdReloadLock(self, load):
+        @wraps(load)
+        def lockedLoad(*args, **kwargs):
+            with self._reload_lock:
+                return load(*args, **kwargs)
+        return lockedLoad
+
+    def warmUp(self, status=None, max_workers=5):
+        """
+            Load concurrently the queue, history, runs, allowed plans and allowed
+            devices whose UID is different from the cached one. Returns the time
+            each request took, or None for the failed ones.
+        """
+        with self._reload_lock:
+            return self.loadChanged(status, max_workers)
+
+    def loadChanged(self, status, max_workers):
+        start = time.monotonic()
+        timings = {}
+        if status is None:
+            status = self.fetchStatus()
+            timings["status"] = time.monotonic() - start if status is not None else None
+        if status is None:
+            print("Warm-up failed: the Queue Server can't be reached")
+            return timings
+
+        run_engine = self.run_engine
+        loaders = {
+            "queue": ("plan_queue_uid", run_engine._plan_queue_uid, run_engine.load_plan_queue),
+            "history": ("plan_history_uid", run_engine._plan_history_uid, run_engine.load_plan_history),
+            "runs": ("run_list_uid", run_engine._run_list_uid, run_engine.load_run_list),
+            "allowed plans": ("plans_allowed_uid", run_engine._allowed_plans_uid, run_engine.load_allowed_plans),
+            "allowed devices": ("devices_allowed_uid", run_engine._allowed_devices_uid, run_engine.load_allowed_devices),
+        }
+
+        def timed(load):
+            loadStart = time.monotonic()
+            load()
+            return time.monotonic() - loadStart
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="warm-up") as pool:
+            futures = {
+                name: pool.submit(timed, load)
+                for name, (key, uid, load) in loaders.items() if status.get(key) != uid
+            }
+        for name in loaders:
+            if name not in futures:
+                print("Warm-up {}: up to date".format(name))
+                continue
+            try:
+                timings[name] = futures[name].result()
+                print("Warm-up {}: {:.1f} ms".format(name, timings[name]*1000))
+            except Exception as e:
+                timings[name] = None
+                print("Warm-up {} failed: {}".format(name, e))
+
+        # Uses the status cached by the client, the UIDs already match the loaded data
+        run_engine.load_re_manager_status(unbuffered=True)
+        self.stale = False
+        print("Warm-up finished in {:.1f} ms".format((time.monotonic() - start)*1000))
+        return timings
+
+    def startWorker(self, name, target, stop=None):
+        """
+            Start a background thread that is stopped and joined on exit.
+        """
+        worker = threading.Thread(target=target, name=name, daemon=True)
+        worker.name = self.registerWorker(name, worker, stop)
+        worker.start()
+        return worker
+
+    def registerWorker(self, name, worker, stop=None):
+        """
+            Register a background thread, and the function that asks it to stop,
+            to be joined on exit. A number is added to the name if another worker
+            already has it, and the registered name is returned.
+        """
+        with self._workers_lock:
+            unique_name = name
+            number = 2
+            while unique_name in self._workers:
+                unique_name = "{} {}".format(name, number)
+                number += 1
+            self._workers[unique_name] = (worker, stop)
+        return unique_name
+
+    def stopMonitor(self):
+        self.__stop_monitor.set()
+        self.__wake_monitor.set()
+
+    def stopSession(self):
+        self.__stop_session.set()
+        self.run_engine._client.session_changed.set()
+
+    def keepSessionAlive(self):
+        """
+            Worker loop that refreshes the access token shortly before it
+            expires, so the requests never go out with an expired token.
+        """
+        client = self.run_engine._client
+        while not self.__stop_session.is_set():
+            delay = client.getRefreshDelay()
+            if delay is None or delay > 0:
+                client.session_changed.wait(delay)
+                client.session_changed.clear()
+                continue
+            try:
+                client.refreshSession(client.auth_key)
+            except Exception as e:
+                print("Failed to refresh the session:", e)
+                client.session_changed.wait(self.poll_ceiling)
+                client.session_changed.clear()
+
+    def exit(self, timeout=2.0):
+        """
+            Stop monitoring the Run Engine, joining every background worker within
+            the timeout. Returns the join time of each worker, or None for the
+            workers that did not stop in time.
+        """
+        with self._command_lanes_lock:
+            self.exiting = True
+        with self._workers_lock:
+            workers = list(self._workers.items())
+
+        for _, (worker, stop) in workers:
+            if stop is not None:
                 try:
-                    self.run_engine._client.wait_for_condition(
-                        param, timeout=sys.float_info.max, monitor=self.__server_monitor)
-                except self.run_engine._client.WaitCancelError:
-                    break
-                except self.run_engine._client.WaitTimeoutError:
-                    pass
-                cmd()
-            self.__monitoring_server = False
-        monitor_server_changes()
+                    stop()
+                except Exception as e:
+                    print("Failed to stop {}: {}".format(worker.name, e))
+
+        deadline = time.monotonic() + timeout
+        join_times = {}
+        for name, (worker, _) in workers:
+            start = time.monotonic()
+            worker.join(max(deadline - start, 0))
+            if worker.is_alive():
+                join_times[name] = None
+                print("Worker {} did not stop within {} s".format(name, timeout))
+            else:
+                join_times[name] = time.monotonic() - start
+                print("Worker {} stopped in {:.1f} ms".format(name, join_times[name]*1000))
+        self.saveSnapshot()
+        if self.recorder is not None:
+            self.recorder.close()
+        return join_times
+
+    def getCommandLane(self, lane):
+        """
+            Get the command queue of a lane, starting its worker on first use.
+            Must be called with the command lanes lock held.
+        """
+        if lane not in self._command_lanes:
+            commands = Queue()
+            self._command_lanes[lane] = commands
+            self.startWorker(
+                lane + " commands", lambda: self.runCommands(commands),
+                lambda: commands.put(None))
+        return self._command_lanes[lane]
+
+    def runCommands(self, commands):
+        """
+            Worker loop that runs the commands of a lane one at a time, in order.
+        """
+        while True:
+            command = commands.get()
+            if command is None:
+                return
+            future, function, args, kwargs = command
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(function(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submitCommand(self, command, *args, lane="queue", onDone=None, **kwargs):
+        """
+            Run a command in the worker thread of a lane, after the commands submitted
+            before it to the same lane, and return its future. onDone(future) is called
+            in the GUI thread once the command finishes.
+        """
+        future = Future()
+        if onDone is not None:
+            future.add_done_callback(lambda done: self.dispatchCallback(onDone, done))
+        with self._command_lanes_lock:
+            if self.exiting:
+                future.set_exception(RuntimeError("The server model is exiting"))
+            else:
+                self.getCommandLane(lane).put((future, command, args, kwargs))
+        return future
+
+    def subscribe(self, predicate, callback, gui_thread=True):
+        """
+            Call callback(status) every time predicate(status) is true for the
+            Queue Server status fetched by the monitor loop. The status is None
+            while the server can't be reached.
+
+            The callbacks run in the GUI thread unless gui_thread is False, in which
+            case they run in the monitor thread. Returns the subscription id.
+        """
+        with self._subscriptions_lock:
+            subscription_id = next(self._subscription_ids)
+            self._subscriptions[subscription_id] = (predicate, callback, gui_thread)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id):
+        """
+            Remove a status subscription.
+        """
+        with self._subscriptions_lock:
+            self._subscriptions.pop(subscription_id, None)
+
+    def hasStatusChanged(self, status):
+        """
+            Check if the local Run Engine status is outdated.
+        """
+        connected = self.run_engine._re_manager_connected
+        if status is None:
+            return connected is not False
+        return not connected or status != self.run_engine._re_manager_status
+
+    def onCommandSent(self, method):
+        """
+            Poll the status at the floor rate right after a command.
+        """
+        self._last_command_time = self.clock()
+        self.poll_interval = self.poll_floor
+        self.requestRefresh()
+
+    def requestRefresh(self):
+        """
+            Make the monitor thread fetch the status and reload what changed now.
+        """
+        self.__wake_monitor.set()
+
+    def getPollInterval(self, status):
+        """
+            Poll fast while the manager is busy or a command was just sent,
+            and back off exponentially while it is idle or unreachable.
+        """
+        isBusy = status is not None and status.get("manager_state", "idle") != "idle"
+        sinceCommand = self.clock() - self._last_command_time
+        if isBusy or sinceCommand < self.command_burst:
+            return self.poll_floor
+        return min(max(self.poll_interval * 2, self.poll_floor), self.poll_ceiling)
+
+    def fetchStatus(self):
+        """
+            Get the Queue Server status, or None if it can't be reached.
+        """
+        client = self.run_engine._client
+        try:
+            return client.status(reload=True)
+        except (client.RequestTimeoutError, client.HTTPRequestError,
+                client.HTTPClientError, client.HTTPServerError):
+            return None
+
+    @DeferredFunction
+    def dispatchCallback(self, callback, value):
+        """
+            Run a status or command callback in the GUI thread.
+        """
+        callback(value)
+
+    def notifySubscribers(self, status):
+        """
+            Run the callbacks of the subscriptions whose predicate matches the status.
+        """
+        with self._subscriptions_lock:
+            subscriptions = list(self._subscriptions.values())
+        for predicate, callback, gui_thread in subscriptions:
+            try:
+                if not predicate(status):
+                    continue
+                if gui_thread:
+                    self.dispatchCallback(callback, status)
+                else:
+                    callback(status)
+            except Exception as e:
+                print("Status subscription failed:", e)
+
+    def monitor_server(self):
+        """
+            Monitor loop that fetches the Queue Server status once per tick
+            and updates the local Run Engine and the subscribers.
+        """
+        while not self.__stop_monitor.is_set():
+            self.status = self.fetchStatus()
+            if self.stale and self.status is not None:
+                self.warmUp(self.status)
+            self.notifySubscribers(self.status)
+            self.poll_interval = self.getPollInterval(self.status)
+            self.__wake_monitor.wait(self.poll_interval)
+            self.__wake_monitor.clear()
@@ -0,0 +1,127 @@
+import os
+import hashlib
+import msgpack
+
+
+class ServerSnapshot:
+    """
+        Local copy of the last known queue, history tail, allowed plans and
+        allowed devices of a Queue Server, with the UIDs they were loaded with.
+    """
+
+    version = 1
+    history_tail = 1000
+
+    # Type of each field of a snapshot
+    fields = {
+        "plan_queue_uid": (str, type(None)),
+        "plan_queue_items": list,
+        "plan_history_uid": (str, type(None)),
+        "plan_history_items": list,
+        "plans_allowed_uid": (str, type(None)),
+        "plans_allowed": dict,
+        "instructions_allowed": dict,
+        "devices_allowed_uid": (str, type(None)),
+        "devices_allowed": dict,
+    }
+
+    def __init__(self, path):
+        self.path = path
+
+    @staticmethod
+    def getDefaultPath(http_server_uri):
+        """
+            Get the snapshot file of a server in the user cache directory.
+        """
+        cache_dir = os.environ.get(
+            "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+        server_id = hashlib.sha1(http_server_uri.encode()).hexdigest()[:16]
+        return os.path.join(cache_dir, "sophys-gui", server_id + ".msgpack")
+
+    def capture(self, run_engine):
+        """
+            Copy the cached state of the Run Engine client. The history UID is only
+            kept if the whole history fits in the tail, otherwise it is always reloaded.
+        """
+        history = run_engine._plan_history_items
+        history_uid = run_engine._plan_history_uid
+        if len(history) > self.history_tail:
+            history = history[-self.history_tail:]
+            history_uid = None
+        return {
+            "version": self.version,
+            "plan_queue_uid": run_engine._plan_queue_uid,
+            "plan_queue_items": list(run_engine._plan_queue_items),
+            "plan_history_uid": history_uid,
+            "plan_history_items": list(history),
+            "plans_allowed_uid": run_engine._allowed_plans_uid,
+            "plans_allowed": dict(run_engine._allowed_plans),
+            "instructions_allowed": dict(run_engine._allowed_instructions),
+            "devices_allowed_uid": run_engine._allowed_devices_uid,
+            "devices_allowed": dict(run_engine._allowed_devices),
+        }
+
+    def validate(self, snapshot):
+        """
+            Raise ValueError if a field of the snapshot is missing or invalid.
+        """
+        for key, types in self.fields.items():
+            if not isinstance(snapshot.get(key, None), types):
+                raise ValueError("Invalid {} in the snapshot".format(key))
+        for key in ("plan_queue_items", "plan_history_items"):
+            if not all(isinstance(item, dict) for item in snapshot[key]):
+                raise ValueError("Invalid {} in the snapshot".format(key))
+
+    def restore(self, run_engine, snapshot):
+        """
+            Fill the Run Engine client caches with a snapshot. The snapshot is
+            validated first, so the caches are left untouched if it is invalid.
+        """
+        self.validate(snapshot)
+        run_engine._plan_queue_items.clear()
+        run_engine._plan_queue_items.extend(snapshot["plan_queue_items"])
+        run_engine._plan_queue_items_pos = {
+            item["item_uid"]: n for n, item in enumerate(run_engine._plan_queue_items)
+            if "item_uid" in item
+        }
+        run_engine._plan_queue_uid = snapshot["plan_queue_uid"]
+        run_engine._plan_history_items.clear()
+        run_engine._plan_history_items.extend(snapshot["plan_history_items"])
+        run_engine._plan_history_uid = snapshot["plan_history_uid"]
+        run_engine._allowed_plans.clear()
+        run_engine._allowed_plans.update(snapshot["plans_allowed"])
+        run_engine._allowed_instructions.clear()
+        run_engine._allowed_instructions.update(snapshot["instructions_allowed"])
+        run_engine._allowed_plans_uid = snapshot["plans_allowed_uid"]
+        run_engine._allowed_devices.clear()
+        run_engine._allowed_devices.update(snapshot["devices_allowed"])
+        run_engine._allowed_devices_uid = snapshot["devices_allowed_uid"]
+
+    def load(self):
+        """
+            Read the snapshot file, or return None if it is missing or invalid.
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as snapshot_file:
+                snapshot = msgpack.unpackb(snapshot_file.read(), strict_map_key=False)
+        except Exception as e:
+            print("Couldn't read the server snapshot:", e)
+            return None
+        if not isinstance(snapshot, dict) or snapshot.get("version") != self.version:
+            return None
+        return snapshot
+
+    def save(self, snapshot):
+        """
+            Write the snapshot file, replacing the previous one at once.
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as snapshot_file:
+                snapshot_file.write(msgpack.packb(snapshot, use_bin_type=True))
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print("Couldn't write the server snapshot:", e)
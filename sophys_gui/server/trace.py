@@ -0,0 +1,104 @@
+import time
+import bisect
+import threading
+import msgpack
+from .fake import FakeHTTPServer
+
+
+class TraceRecorder:
+    """
+        Writes every response received from the Queue Server to a msgpack stream,
+        with the time in seconds since the recording started.
+
+        The authentication requests are not recorded, so the trace holds no
+        credentials or tokens.
+    """
+
+    version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.start = time.time()
+        self.lock = threading.Lock()
+        self.packer = msgpack.Packer(use_bin_type=True)
+        self.file = open(path, "wb")
+        self.file.write(self.packer.pack({"version": self.version, "start": self.start}))
+
+    def record(self, method, endpoint, params, response):
+        if endpoint.startswith("/api/auth"):
+            return
+        entry = {
+            "time": time.time() - self.start, "method": method,
+            "endpoint": endpoint, "params": params, "response": response
+        }
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(self.packer.pack(entry))
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def readTrace(path):
+    """
+        Read the header and the list of responses of a trace file.
+    """
+    with open(path, "rb") as trace_file:
+        unpacker = msgpack.Unpacker(trace_file, raw=False, strict_map_key=False)
+        header = next(unpacker, None)
+        if not isinstance(header, dict) or header.get("version") != TraceRecorder.version:
+            raise ValueError("{} is not a sophys-gui trace".format(path))
+        return header, list(unpacker)
+
+
+class TraceReplay(FakeHTTPServer):
+    """
+        Stand-in for the Queue Server that answers each request with the response
+        recorded for the same endpoint at the same time of the traced session,
+        played at 1x or accelerated speed.
+
+        Requests that were never recorded are answered as successful commands, and
+        the session keeps its last state once the end of the trace is reached.
+    """
+
+    def __init__(self, path, speed=1.0):
+        self.speed = speed
+        self.header, entries = readTrace(path)
+        self.duration = entries[-1]["time"] if entries else 0
+        self.times = {}
+        self.responses = {}
+        for entry in entries:
+            key = (entry["method"], entry["endpoint"])
+            self.times.setdefault(key, []).append(entry["time"])
+            self.responses.setdefault(key, []).append(entry["response"])
+        self.start_time = None
+
+    def start(self, host="127.0.0.1", port=0):
+        uri = super().start(host, port)
+        self.start_time = time.monotonic()
+        return uri
+
+    def getTraceTime(self):
+        """
+            Get the time of the traced session being replayed, in seconds.
+        """
+        if self.start_time is None:
+            return 0
+        return min((time.monotonic() - self.start_time) * self.speed, self.duration)
+
+    def isFinished(self):
+        return self.start_time is not None and self.getTraceTime() >= self.duration
+
+    def handle(self, method, path, params, headers):
+        key = (method, path)
+        if key not in self.times:
+            if method == "GET":
+                return 404, {"detail": "Not Found"}
+            return 200, {"success": True, "msg": ""}
+        index = bisect.bisect_right(self.times[key], self.getTraceTime()) - 1
+        return 200, self.responses[key][max(index, 0)]
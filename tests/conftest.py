@@ -0,0 +1,11 @@
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def qapp():
+    from qtpy.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
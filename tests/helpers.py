@@ -0,0 +1,77 @@
+import time
+from concurrent.futures import Future
+from qtpy.QtCore import QCoreApplication, QtMsgType, qInstallMessageHandler
+from qtpy.QtTest import QAbstractItemModelTester
+from bluesky_widgets.models.run_engine_client import RunEngineClient
+from sophys_gui.server import PlanCatalog
+
+
+class FakeServerModel:
+    """
+        Server model that keeps the submitted commands instead of sending them.
+    """
+
+    def __init__(self):
+        self.run_engine = RunEngineClient(http_server_uri="http://localhost:1")
+        self.catalog = PlanCatalog(self.run_engine)
+        self.commands = []
+        self.refreshes = 0
+
+    def submitCommand(self, command, *args, onDone=None, **kwargs):
+        future = Future()
+        self.commands.append((command, args, kwargs, future))
+        if onDone is not None:
+            future.add_done_callback(onDone)
+        return future
+
+    def requestRefresh(self):
+        self.refreshes += 1
+
+
+def createItem(idx, name="list_scan", user="user"):
+    return {
+        "item_uid": "uid{}".format(idx), "name": name, "item_type": "plan",
+        "user": user, "args": [["det"], "motor", [0, 1, 2]], "kwargs": {"num": idx}}
+
+
+def createHistoryItem(idx, exit_status="completed", user="user"):
+    item = createItem(idx, user=user)
+    item["result"] = {
+        "exit_status": exit_status, "time_start": float(idx),
+        "time_stop": idx + 1.0, "traceback": ""}
+    return item
+
+
+def processEvents():
+    QCoreApplication.processEvents()
+
+
+def waitUntil(predicate, timeout=5.0):
+    """
+        Wait for a condition reached by a background thread.
+    """
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "Timed out waiting for the condition"
+        time.sleep(0.01)
+
+
+class ModelChecker:
+    """
+        Run QAbstractItemModelTester over a model, collecting the
+        warnings it reports.
+    """
+
+    def __init__(self, model):
+        self.warnings = []
+        self.previous = qInstallMessageHandler(self.handleMessage)
+        self.tester = QAbstractItemModelTester(
+            model, QAbstractItemModelTester.FailureReportingMode.Warning)
+
+    def handleMessage(self, msgType, context, message):
+        if msgType != QtMsgType.QtDebugMsg:
+            self.warnings.append(message)
+
+    def close(self):
+        qInstallMessageHandler(self.previous)
+        return self.warnings
@@ -0,0 +1,72 @@
+import typing
+from sophys_gui.server import PlanCatalog
+
+
+class Event:
+
+    def connect(self, callback):
+        pass
+
+
+class RunEngine:
+
+    def __init__(self, allowed_plans):
+        self.events = type("Events", (), {"allowed_plans_changed": Event()})()
+        self._allowed_plans = allowed_plans
+        self._allowed_plans_uid = "uid"
+        self._allowed_instructions = {}
+
+
+def getPlan(annotation):
+    return {
+        "name": "scan",
+        "parameters": [{
+            "name": "param",
+            "kind": {"name": "POSITIONAL_OR_KEYWORD", "value": 1},
+            "description": "A parameter.",
+            "annotation": {"type": annotation},
+        }]
+    }
+
+
+def getParameter(annotation):
+    catalog = PlanCatalog(RunEngine({"scan": getPlan(annotation)}))
+    return catalog.getParameter("plan", "scan", "param")
+
+
+def test_builtin_annotation():
+    param = getParameter("typing.List[int]")
+    assert param["python_type"] == typing.List[int]
+    assert param["required"]
+
+
+def test_queue_server_annotations():
+    assert getParameter("__PLAN__")["python_type"] == typing.Any
+    assert getParameter("__PLAN_OR_DEVICE__")["python_type"] == typing.Any
+    assert getParameter("typing.List[__PLAN_OR_DEVICE__]")["python_type"] == typing.List[typing.Any]
+
+
+def test_unknown_annotation():
+    param = getParameter("Motors")
+    assert param["type"] == "Motors"
+    assert param["python_type"] is object
+    assert getParameter("typing.List[Motors]")["python_type"] is object
+
+
+def test_optional_annotation():
+    assert not getParameter("typing.Optional[int]")["required"]
+    assert getParameter("typing.List[int]")["required"]
+
+
+def getMotorParameter(types):
+    plan = getPlan("")
+    plan["parameters"][0]["description"] = "Motors.-.-motor;start;" + types
+    catalog = PlanCatalog(RunEngine({"scan": plan}))
+    return catalog.getParameter("plan", "scan", "param")
+
+
+def test_motor_annotation():
+    param = getMotorParameter("float,typing.Optional[float]")
+    assert param["type"] == [float, typing.Optional[float]]
+    assert param["required"]
+    assert not getMotorParameter("typing.Optional[float]")["required"]
@@ -0,0 +1,88 @@
+import time
+import pytest
+from sophys_gui.server import SophysManagerAPI
+from sophys_gui.server.fake import FakeQueueServer
+
+
+@pytest.fixture
+def server():
+    server = FakeQueueServer(queue_size=5, history_size=10, token_lifetime=2, seed=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = SophysManagerAPI(http_server_uri=server.uri)
+    client.refresh_margin = 1
+    client.login("user", password="password", provider="fake")
+    yield client
+    client.close()
+
+
+class CountingClient(SophysManagerAPI):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refreshes = 0
+
+    def session_refresh(self, *, refresh_token=None):
+        self.refreshes += 1
+        return super().session_refresh(refresh_token=refresh_token)
+
+
+def test_refresh_delay(client):
+    # The token is refreshed a fifth of its lifetime, at most refresh_margin, before it expires
+    assert client.getRefreshDelay() == pytest.approx(1.6, abs=0.2)
+    assert client.token_expiration - client.token_refresh_time == pytest.approx(0.4)
+    client.token_refresh_time = time.time() - 1
+    assert client.getRefreshDelay() == 0
+
+
+def test_no_refresh_delay_without_token(server):
+    client = SophysManagerAPI(http_server_uri=server.uri)
+    assert client.getRefreshDelay() is None
+    assert not client.isTokenExpired()
+    client.close()
+
+
+def test_expired_token_is_refreshed_before_the_request(server):
+    client = CountingClient(http_server_uri=server.uri)
+    client.login("user", password="password", provider="fake")
+    client.token_expiration = time.time() - 1
+    assert client.status()["items_in_queue"] == 5
+    assert client.refreshes == 1
+    client.close()
+
+
+def test_rejected_token_is_refreshed_once(server):
+    client = CountingClient(http_server_uri=server.uri)
+    client.login("user", password="password", provider="fake")
+    # The server considers the token expired while the client doesn't
+    server.tokens.clear()
+    assert client.status()["items_in_queue"] == 5
+    assert client.refreshes == 1
+    client.close()
+
+
+def test_retry_fails_after_one_refresh(server):
+    client = CountingClient(http_server_uri=server.uri)
+    client.login("user", password="password", provider="fake")
+    server.token_lifetime = -1
+    server.tokens.clear()
+    with pytest.raises(client.HTTPClientError) as error:
+        client.status()
+    assert error.value.response.status_code == 401
+    assert client.refreshes == 1
+    client.close()
+
+
+def test_other_client_errors_are_not_retried(server):
+    client = CountingClient(http_server_uri=server.uri)
+    client.login("user", password="password", provider="fake")
+    with pytest.raises(client.HTTPClientError) as error:
+        client.send_request(method=("GET", "/api/missing"))
+    assert error.value.response.status_code == 404
+    assert client.refreshes == 0
+    client.close()
@@ -0,0 +1,70 @@
+import msgpack
+import msgpack_numpy
+import numpy as np
+import pytest
+from sophys_gui.server.documents import EVENT_KEYS, FULL_DECODING_SIZE, \
+    decodeDocument, decodeDocumentHeader
+
+
+def createEvent(payload):
+    """
+        Create an event whose data comes before the header keys, with every
+        msgpack type in the readings and timestamps.
+    """
+    long = 70000 if payload > FULL_DECODING_SIZE else 100
+    data = {
+        "image": np.arange(payload // 64 * 8, dtype=np.float64).reshape(-1, 8),
+        "nested": {"list": [1, -1, -33, 2**40, -2**40, 1.5, None, True, False],
+                   "map": {str(idx): [idx, {"deep": [[idx]]}] for idx in range(20)}},
+        "ext": [msgpack.ExtType(1, b"a" * size) for size in (1, 2, 4, 8, 16, 3, 300, long)],
+        "text": ["x" * size for size in (3, 40, 300, long)],
+        "bytes": [b"y" * size for size in (3, 300, long)],
+        "array": list(range(long)),
+        "map": {str(idx): idx for idx in range(long)},
+        "ints": [127, 255, 65535, 2**32 - 1, 2**64 - 1, -128, -32768, -2**31, -2**63],
+        "empty_ext": msgpack.ExtType(2, b""),
+    }
+    document = {
+        "data": data, "timestamps": {key: 1.0 for key in data}, "filled": {},
+        "descriptor": "primary", "seq_num": 7, "uid": "event-7", "time": 1.5,
+    }
+    return msgpack_numpy.packb(("event", document))
+
+
+def getHeader(message):
+    name, document = decodeDocument(message)
+    return name, {key: document[key] for key in EVENT_KEYS if key in document}
+
+
+@pytest.mark.parametrize("payload", [1000, 4 * FULL_DECODING_SIZE])
+def test_event_header(payload):
+    message = createEvent(payload)
+    assert (len(message) < FULL_DECODING_SIZE) == (payload < FULL_DECODING_SIZE)
+    assert decodeDocumentHeader(message) == getHeader(message)
+    assert decodeDocumentHeader(message) == (
+        "event", {"descriptor": "primary", "seq_num": 7, "uid": "event-7", "time": 1.5})
+
+
+def test_custom_keys():
+    message = createEvent(4 * FULL_DECODING_SIZE)
+    name, document = decodeDocumentHeader(message, keys=("seq_num", "filled"))
+    assert (name, document) == ("event", {"seq_num": 7, "filled": {}})
+
+
+@pytest.mark.parametrize("payload", [1000, 4 * FULL_DECODING_SIZE])
+def test_other_documents_are_fully_decoded(payload):
+    document = {
+        "uid": "start", "plan_name": "scan", "hints": {"dimensions": [[["motor"], "primary"]]},
+        "image": np.ones(payload // 8)}
+    message = msgpack_numpy.packb(("start", document))
+    name, decoded = decodeDocumentHeader(message)
+    assert name == "start"
+    assert decoded.keys() == document.keys()
+    assert decoded["hints"] == document["hints"]
+    assert np.array_equal(decoded["image"], document["image"])
+
+
+def test_invalid_message():
+    message = msgpack.packb(["event", {}, "extra"]) + b"\0" * FULL_DECODING_SIZE
+    with pytest.raises(ValueError):
+        decodeDocumentHeader(message)
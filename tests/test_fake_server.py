@@ -0,0 +1,123 @@
+import time
+import pytest
+from sophys_gui.server import ServerModel, SophysManagerAPI
+from sophys_gui.server.fake import FakeQueueServer
+from helpers import waitUntil
+
+
+@pytest.fixture
+def server():
+    server = FakeQueueServer(queue_size=5, history_size=10, seed=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    client = SophysManagerAPI(http_server_uri=server.uri)
+    yield client
+    client.close()
+
+
+def getQueueUids(client):
+    return [item["item_uid"] for item in client.queue_get()["items"]]
+
+
+def createPlan(name="fake_scan_1"):
+    return {"name": name, "item_type": "plan", "args": [], "kwargs": {}}
+
+
+def test_status(server, client):
+    status = client.status()
+    assert status["items_in_queue"] == 5
+    assert status["items_in_history"] == 10
+    assert status["manager_state"] == "idle"
+    assert status["plan_queue_uid"] == server.uids["plan_queue_uid"]
+
+
+def test_queue_commands(server, client):
+    uids = getQueueUids(client)
+    queue_uid = client.status()["plan_queue_uid"]
+
+    item = client.item_add(createPlan(), before_uid=uids[1])["item"]
+    uids.insert(1, item["item_uid"])
+    assert getQueueUids(client) == uids
+    assert client.status()["plan_queue_uid"] != queue_uid
+
+    client.item_move(uid=uids[0], pos_dest="back")
+    uids.append(uids.pop(0))
+    assert getQueueUids(client) == uids
+
+    client.item_move_batch(uids=[uids[3], uids[4]], before_uid=uids[0])
+    uids = [uids[3], uids[4], uids[0], uids[1], uids[2], uids[5]]
+    assert getQueueUids(client) == uids
+
+    client.item_remove(uid=uids[2])
+    client.item_remove_batch(uids=[uids[0], uids[5]])
+    assert getQueueUids(client) == [uids[1], uids[3], uids[4]]
+    assert [item["item_uid"] for item in server.queue] == [uids[1], uids[3], uids[4]]
+
+
+def test_rejected_command(client):
+    with pytest.raises(client.RequestFailedError):
+        client.item_remove(uid="missing")
+
+
+def test_server_model(server, tmp_path):
+    model = ServerModel(server.uri, cache_path=str(tmp_path / "snapshot.msgpack"))
+    try:
+        run_engine = model.run_engine
+        assert model.fetchStatus()["items_in_history"] == 10
+        assert len(run_engine._plan_queue_items) == 5
+        assert len(run_engine._plan_history_items) == 10
+
+        uids = [item["item_uid"] for item in run_engine._plan_queue_items]
+        model.submitCommand(run_engine._client.item_move, uid=uids[-1], pos_dest="front").result(5)
+        model.submitCommand(run_engine.history_clear).result(5)
+        waitUntil(lambda: run_engine._plan_history_items == [])
+        assert [item["item_uid"] for item in run_engine._plan_queue_items] == uids[-1:] + uids[:-1]
+        assert model.fetchStatus()["items_in_history"] == 0
+    finally:
+        model.exit()
+
+
+def test_login(server, client):
+    client.login("user", password="password", provider="fake")
+    token = client.auth_key[0]
+    assert server.tokens[token] > time.time()
+    assert client.getRefreshDelay() > 0
+    assert client.send_request(method="whoami")["roles"] == ["admin"]
+    assert client.status()["manager_state"] == "idle"
+
+    server.tokens[token] = 0
+    with pytest.raises(client.ClientError):
+        client.send_request(method="status", auto_refresh_session=False)
+
+
+def test_latency():
+    server = FakeQueueServer(queue_size=0, history_size=0, latency=0.2, seed=0)
+    client = SophysManagerAPI(http_server_uri=server.start())
+    try:
+        start = time.monotonic()
+        client.status()
+        assert time.monotonic() - start >= 0.2
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_failure_rate(tmp_path):
+    server = FakeQueueServer(queue_size=0, history_size=0, failure_rate=1.0, seed=0)
+    client = SophysManagerAPI(http_server_uri=server.start())
+    try:
+        with pytest.raises(client.HTTPServerError):
+            client.status()
+    finally:
+        client.close()
+        server.stop()
+
+    server = FakeQueueServer(queue_size=0, history_size=0, failure_rate=0.3, seed=0)
+    codes = [server.handle("GET", "/api/status", {}, {})[0] for _ in range(1000)]
+    assert set(codes) == {200, 500}
+    assert 0.25 < codes.count(500) / len(codes) < 0.35
@@ -0,0 +1,96 @@
+from qtpy.QtCore import Qt
+from sophys_gui.components.list_models import HistoryModel, ListFilterModel
+from helpers import FakeServerModel, ModelChecker, createHistoryItem
+
+
+def createModel(count=10):
+    re_model = FakeServerModel()
+    for idx in range(count):
+        item = createHistoryItem(
+            idx, exit_status="failed" if idx % 3 == 0 else "completed",
+            user="alice" if idx % 2 == 0 else "bob")
+        if idx >= 5:
+            item["name"] = "count"
+        re_model.run_engine._plan_history_items.append(item)
+    model = HistoryModel(re_model)
+    filterModel = ListFilterModel(model)
+    return model, filterModel
+
+
+def getFilteredUids(filterModel):
+    model = filterModel.sourceModel()
+    return [
+        model.getItem(filterModel.getSourceRow(row))["item_uid"]
+        for row in range(filterModel.rowCount())]
+
+
+def getUids(indexes):
+    return ["uid{}".format(idx) for idx in indexes]
+
+
+def test_no_filter():
+    _, filterModel = createModel()
+    assert getFilteredUids(filterModel) == getUids(range(9, -1, -1))
+
+
+def test_text_filter():
+    _, filterModel = createModel()
+    checker = ModelChecker(filterModel)
+    filterModel.setFilterText("  COUNT ")
+    assert getFilteredUids(filterModel) == getUids([9, 8, 7, 6, 5])
+    filterModel.setFilterText("num = 3")
+    assert getFilteredUids(filterModel) == getUids([3])
+    filterModel.setFilterText("missing")
+    assert getFilteredUids(filterModel) == []
+    filterModel.setFilterText("")
+    assert filterModel.rowCount() == 10
+    assert checker.close() == []
+
+
+def test_status_and_user_filters():
+    _, filterModel = createModel()
+    filterModel.setStatusFilter("Failed")
+    assert getFilteredUids(filterModel) == getUids([9, 6, 3, 0])
+    filterModel.setUserFilter(" ALI ")
+    assert getFilteredUids(filterModel) == getUids([6, 0])
+    filterModel.setFilterText("count")
+    assert getFilteredUids(filterModel) == getUids([6])
+    filterModel.setStatusFilter(None)
+    filterModel.setFilterText("")
+    assert getFilteredUids(filterModel) == getUids([8, 6, 4, 2, 0])
+
+
+def test_filter_follows_the_list():
+    model, filterModel = createModel()
+    filterModel.setUserFilter("bob")
+    history = list(model._re_model.run_engine._plan_history_items)
+    history.append(createHistoryItem(10, user="bob"))
+    model.onPlanListChanged((history[2:], "changed"))
+    assert getFilteredUids(filterModel) == getUids([10, 9, 7, 5, 3])
+
+
+def test_source_rows():
+    model, filterModel = createModel()
+    filterModel.setUserFilter("bob")
+    assert filterModel.getSourceRows(0, 25) == (0, 8)
+    assert filterModel.getSourceRows(1, 2) == (2, 4)
+    assert filterModel.getSourceRows(-3, 0) == (0, 0)
+    assert filterModel.getSourceRows(5, 30) == (0, -1)
+
+    model.visible_rows = filterModel.getSourceRows(2, 3)
+    names = [
+        filterModel.data(filterModel.index(row, 1), Qt.DisplayRole)
+        for row in range(filterModel.rowCount())]
+    assert names == [None, None, "count", "list_scan", None]
+
+
+def test_selection_mapping():
+    model, filterModel = createModel()
+    filterModel.setStatusFilter("failed")
+    filterModel.setSelectedRows([1, 3])
+    assert model.getSelectedRows() == [3, 9]
+    assert filterModel.getSelectedRows() == [1, 3]
+    filterModel.setStatusFilter("completed")
+    assert filterModel.getSelectedRows() == []
+    filterModel.select(0)
+    assert model.getSelectedRows() == [1]
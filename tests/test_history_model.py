@@ -0,0 +1,104 @@
+from sophys_gui.components.list_models import HistoryModel
+from helpers import FakeServerModel, ModelChecker, createHistoryItem
+
+
+def createHistory(count, first=0):
+    return [createHistoryItem(idx) for idx in range(first, first + count)]
+
+
+def createModel(history):
+    re_model = FakeServerModel()
+    re_model.run_engine._plan_history_items.extend(history)
+    return HistoryModel(re_model)
+
+
+def getUids(model):
+    return [item["item_uid"] for item in model._items]
+
+
+def getRecentUids(history, count):
+    return [item["item_uid"] for item in reversed(history)][:count]
+
+
+def test_fetch_pages():
+    history = createHistory(250)
+    model = createModel(history)
+    assert model.getTotalCount() == 250
+    assert model.getResidentCount() == 100
+    assert getUids(model) == getRecentUids(history, 100)
+
+    resident = []
+    while model.canFetchMore():
+        model.fetchMore()
+        resident.append(model.getResidentCount())
+    assert resident == [200, 250]
+    assert model.rowCount() == 250
+    assert getUids(model) == getRecentUids(history, 250)
+    model.fetchMore()
+    assert model.getResidentCount() == 250
+
+
+def test_add_while_partially_fetched():
+    history = createHistory(250)
+    model = createModel(history)
+    model.fetchMore()
+    history = history + createHistory(3, first=250)
+    model.onPlanListChanged((history, "added"))
+    assert model.getTotalCount() == 253
+    assert model.getResidentCount() == 200
+    assert getUids(model) == getRecentUids(history, 200)
+    while model.canFetchMore():
+        model.fetchMore()
+    assert getUids(model) == getRecentUids(history, 253)
+
+
+def test_clear_while_partially_fetched():
+    model = createModel(createHistory(250))
+    model.fetchMore()
+    model.onPlanListChanged(([], "cleared"))
+    assert model.getTotalCount() == 0
+    assert model.getResidentCount() == 0
+    assert not model.canFetchMore()
+
+    history = createHistory(150, first=1000)
+    model.onPlanListChanged((history, "filled"))
+    assert model.getResidentCount() == 100
+    assert getUids(model) == getRecentUids(history, 100)
+    assert model.canFetchMore()
+
+
+def test_model_checks():
+    """
+        QAbstractItemModelTester fetches every page when it starts.
+    """
+    history = createHistory(250)
+    model = createModel(history)
+    checker = ModelChecker(model)
+    assert model.getResidentCount() == 250
+    history = createHistory(3, first=250) + history[100:]
+    model.onPlanListChanged((history, "changed"))
+    assert getUids(model) == getRecentUids(history, 153)
+    model.onPlanListChanged(([], "cleared"))
+    model.onPlanListChanged((createHistory(150), "filled"))
+    model.fetchMore()
+    assert checker.close() == []
+
+
+def test_selection_across_fetches():
+    history = createHistory(250)
+    model = createModel(history)
+    model.setSelectedRows([0, 5])
+    assert model.getSelectedPositions() == [244, 249]
+
+    model.fetchMore()
+    assert model.getSelectedRows() == [0, 5]
+    assert model.getSelectedPositions() == [244, 249]
+
+    model.setSelectedRows([0, 150])
+    assert model.getSelectedPositions() == [99, 249]
+    history = history + createHistory(3, first=250)
+    model.onPlanListChanged((history, "added"))
+    assert model.getSelectedRows() == [3, 153]
+    assert model.getSelectedPositions() == [99, 249]
+    model.setSelectedItems()
+    assert model._re_model.run_engine.selected_history_item_pos == [99, 249]
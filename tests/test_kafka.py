@@ -0,0 +1,114 @@
+import time
+from kafka.errors import KafkaTimeoutError
+from sophys_gui.components.led import SophysConnectionLed
+from sophys_gui.server.kafka import KafkaDocumentBroker, KafkaDataRegister
+
+
+class FakeConsumer:
+
+    def __init__(self, partitions=("partition", ), answers=None):
+        self.partitions = set(partitions)
+        self.answers = answers
+        self.checks = 0
+        self.closed = False
+
+    def poll(self, timeout_ms):
+        time.sleep(0.001)
+        return {}
+
+    def assignment(self):
+        return self.partitions
+
+    def end_offsets(self, partitions, timeout_ms):
+        self.checks += 1
+        if self.answers is not None and self.checks > self.answers:
+            raise KafkaTimeoutError("Failed to get offsets by timestamps")
+        return {partition: 0 for partition in partitions}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeBroker(KafkaDocumentBroker):
+    """
+        Broker whose consumers are taken from a list, stopping when it runs out.
+    """
+
+    retry_floor = 0.02
+    liveness_interval = 0.0
+    liveness_timeout = 0.05
+
+    def __init__(self, consumers):
+        super().__init__("localhost:1", "topic")
+        self.consumers = list(consumers)
+        self.attempts = []
+        self.changes = []
+        self.connectionChanged.connect(self.changes.append)
+
+    def createConsumer(self):
+        self.attempts.append(time.monotonic())
+        if not self.consumers:
+            self.stop()
+            return None
+        return self.consumers.pop(0)
+
+
+def test_broker_going_down_is_detected():
+    consumer = FakeConsumer(answers=3)
+    broker = FakeBroker([consumer])
+    led = SophysConnectionLed(broker.connectionChanged)
+    broker.connectionChanged.connect(lambda connected: states.append(led.currentIndex()))
+    states = []
+    broker.run()
+    assert broker.changes == [True, False]
+    assert states == [1, 0]
+    assert consumer.checks == 4
+    assert consumer.closed
+
+
+def test_consumer_without_partitions_is_not_connected():
+    consumer = FakeConsumer(partitions=())
+    broker = FakeBroker([consumer])
+    broker.run()
+    assert broker.changes == []
+    assert consumer.checks == 0
+    assert consumer.closed
+
+
+def test_reconnection_backoff():
+    broker = FakeBroker([None, None, None, FakeConsumer(answers=1), None, None])
+    broker.run()
+    gaps = [end - start for start, end in zip(broker.attempts, broker.attempts[1:])]
+    assert broker.changes == [True, False]
+    assert gaps[1] > 1.5 * gaps[0] and gaps[2] > 1.5 * gaps[1]
+    assert gaps[4] < gaps[2]
+
+
+def startNothing(name, target, stop=None):
+    return None
+
+
+def test_register_notifies_once_until_read():
+    register = KafkaDataRegister("localhost:1", "register topic", startNothing)
+    register.get_state()
+    emitted = []
+    register.progressChanged.connect(lambda: emitted.append(True))
+
+    subscription = register.subscription
+    subscription.put(("start", {"uid": "run"}))
+    subscription.put(("descriptor", {"name": "primary", "uid": "primary"}))
+    for seq_num in range(1, 101):
+        subscription.put(("event", {"descriptor": "primary", "seq_num": seq_num}))
+    subscription.close()
+    register.monitor()
+    assert len(emitted) == 1
+
+    state = register.get_state()
+    assert state["metadata"] == {"uid": "run"}
+    assert state["seq_num"] == 100
+    assert state["event_count"] == 100
+
+    register.updateProgress(101)
+    register.updateProgress(102)
+    assert len(emitted) == 2
+    assert register.get_state()["seq_num"] == 102
@@ -0,0 +1,139 @@
+import random
+import itertools
+import pytest
+from qtpy.QtCore import Qt
+from sophys_gui.components.list_models import ListModel
+from sophys_gui.functions import getContiguousBlocks, getStableKeys
+from helpers import FakeServerModel, ModelChecker, createItem
+
+
+def createModel(items=()):
+    re_model = FakeServerModel()
+    model = ListModel(
+        re_model, re_model.run_engine.events.plan_queue_changed,
+        list(items), lambda section: section + 1, "Queue")
+    return model
+
+
+def renderAll(model):
+    for row in range(model.rowCount()):
+        for column in range(model.columnCount()):
+            model.data(model.index(row, column), Qt.DisplayRole)
+
+
+def checkModel(model, items, revision):
+    keys = [model.getItemKey(item) for item in items]
+    assert [model.getItemKey(item) for item in model._items] == keys
+    assert all(old is new for old, new in zip(model._items, items))
+    assert all(model.getItemRow(key) == row for row, key in enumerate(keys))
+    for (key, cache_revision), cells in model._render_cache.items():
+        assert cache_revision == revision
+        item = model._items[model.getItemRow(key)]
+        for (column, role), value in cells.items():
+            assert value == model.renderCell(item, column, role)
+
+
+def getRandomItems(rng, pool=20):
+    items = []
+    for idx in rng.sample(range(pool), rng.randint(0, pool)):
+        item = createItem(idx)
+        if rng.random() < 0.2:
+            item["kwargs"]["num"] = -idx
+        items.append(item)
+    return items
+
+
+def test_contiguous_blocks():
+    assert getContiguousBlocks([]) == []
+    assert getContiguousBlocks([5, 1, 2, 3, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+
+
+def test_stable_keys():
+    assert getStableKeys([], []) == set()
+    assert getStableKeys("abcde", "abcde") == set("abcde")
+    assert getStableKeys("abcde", "eabcd") == set("abcd")
+    rng = random.Random(0)
+    for _ in range(200):
+        oldKeys = list(range(rng.randint(0, 8)))
+        newKeys = rng.sample(oldKeys, len(oldKeys))
+        stable = getStableKeys(oldKeys, newKeys)
+        assert [key for key in newKeys if key in stable] == sorted(stable)
+        longest = max(
+            (len(keys) for size in range(len(newKeys) + 1)
+             for keys in itertools.combinations(newKeys, size)
+             if list(keys) == sorted(keys)), default=0)
+        assert len(stable) == longest
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_updates(seed):
+    rng = random.Random(seed)
+    model = createModel()
+    checker = ModelChecker(model)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    for revision in range(50):
+        renderAll(model)
+        items = getRandomItems(rng)
+        model.onPlanListChanged((items, revision))
+        checkModel(model, items, revision)
+    assert checker.close() == []
+    assert resets == []
+
+
+def test_unchanged_items_keep_their_renders():
+    items = [createItem(idx) for idx in range(5)]
+    model = createModel(items)
+    renderAll(model)
+    changed = dict(items[2], kwargs={"num": 100})
+    model.onPlanListChanged(([items[4], items[0], changed, items[1]], "next"))
+    keys = {key for key, _ in model._render_cache}
+    assert keys == {"uid4", "uid0", "uid1"}
+
+
+def test_empty_and_full_lists():
+    items = [createItem(idx) for idx in range(10)]
+    model = createModel()
+    checker = ModelChecker(model)
+    inserted = []
+    removed = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: removed.append((first, last)))
+    model.onPlanListChanged((items, 1))
+    checkModel(model, items, 1)
+    renderAll(model)
+    model.onPlanListChanged(([], 2))
+    checkModel(model, [], 2)
+    assert checker.close() == []
+    assert inserted == [(0, 9)]
+    assert removed == [(0, 9)]
+    assert model._render_cache == {}
+
+
+@pytest.mark.parametrize("newKeys", [
+    ["uid0", "uid1", "uid0"],
+    ["uid0", None, "uid2"],
+])
+def test_reset_fallback(newKeys):
+    model = createModel([createItem(idx) for idx in range(3)])
+    checker = ModelChecker(model)
+    renderAll(model)
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    items = [
+        dict(createItem(0, name="scan{}".format(row)), item_uid=key)
+        for row, key in enumerate(newKeys)]
+    model.onPlanListChanged((items, 1))
+    renderAll(model)
+    assert checker.close() == []
+    assert resets == [True]
+    assert model._items == items
+    assert model._render_cache == {}
+    names = [model.data(model.index(row, 0), Qt.DisplayRole) for row in range(3)]
+    assert names == ["scan0", "scan1", "scan2"]
+
+    items = [createItem(idx) for idx in range(3)]
+    model.onPlanListChanged((items, 2))
+    assert resets == [True, True]
+    renderAll(model)
+    assert {key for key, _ in model._render_cache} == {"uid0", "uid1", "uid2"}
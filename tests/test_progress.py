@@ -0,0 +1,48 @@
+import time
+from qtpy.QtCore import QObject, Signal
+from sophys_gui.components.running_item.progress import ProgressBar
+from helpers import processEvents
+
+
+class Events(QObject):
+
+    running_item_changed = Signal(object)
+
+
+class RunEngine:
+
+    def __init__(self):
+        self.events = Events()
+        self._running_item = {}
+
+
+class ServerModel:
+
+    def startWorker(self, name, target, stop=None):
+        return None
+
+
+def test_events_are_shown_once_per_frame():
+    progress = ProgressBar(RunEngine(), "localhost:1", "progress topic", ServerModel())
+    register = progress.kafka_monitor
+    register.get_state()
+    progress.running = True
+    progress.total_events = 200
+    emitted = []
+    register.progressChanged.connect(lambda: emitted.append(True))
+    values = []
+    progress.valueChanged.connect(values.append)
+
+    for seq_num in range(1, 101):
+        register.updateProgress(seq_num)
+    # The first event is shown at once and the others at the end of the frame
+    assert len(emitted) == 2
+    assert values == [0]
+    assert progress.frame_timer.isActive()
+
+    deadline = time.monotonic() + 1
+    while progress.frame_timer.isActive() and time.monotonic() < deadline:
+        processEvents()
+        time.sleep(0.001)
+    assert values == [0, 50]
+    assert len(emitted) == 2
@@ -0,0 +1,95 @@
+import pytest
+from sophys_gui.components import list_models
+from sophys_gui.components.list_models import QueueModel
+from helpers import FakeServerModel, createItem
+
+
+@pytest.fixture
+def errors(monkeypatch):
+    errors = []
+    monkeypatch.setattr(
+        list_models, "showCommandError",
+        lambda description, error: errors.append((description, error)))
+    return errors
+
+
+def createModel(count=5):
+    re_model = FakeServerModel()
+    re_model.run_engine._plan_queue_items.extend(createItem(idx) for idx in range(count))
+    model = QueueModel(re_model, "up_down")
+    model.planListChanges = []
+    model.planListChanged.connect(model.planListChanges.append)
+    return model
+
+
+def getKeys(model):
+    return [model.getItemKey(item) for item in model._items]
+
+
+def getLastCommand(model):
+    return model._re_model.commands[-1]
+
+
+def test_failed_delete_restores_the_queue(errors):
+    model = createModel()
+    model.setSelectedRows([1, 2])
+    model.delete_item()
+    assert getKeys(model) == ["uid0", "uid3", "uid4"]
+    command, args, _, future = getLastCommand(model)
+    assert command == model.remove_items
+    assert args == (["uid1", "uid2"], )
+
+    error = RuntimeError("Item is locked")
+    future.set_exception(error)
+    assert getKeys(model) == ["uid0", "uid1", "uid2", "uid3", "uid4"]
+    assert errors == [("delete the items", error)]
+
+
+def test_successful_delete_keeps_the_expected_queue(errors):
+    model = createModel()
+    model.setSelectedRows([0])
+    model.delete_item()
+    getLastCommand(model)[3].set_result(None)
+    assert getKeys(model) == ["uid1", "uid2", "uid3", "uid4"]
+    assert errors == []
+
+
+@pytest.mark.parametrize("command", ["clear_all", "move_bottom"])
+def test_failed_optimistic_commands_restore_the_queue(errors, command):
+    model = createModel()
+    model.setSelectedRows([0])
+    getattr(model, command)()
+    model.flushMove()
+    assert getKeys(model) != ["uid0", "uid1", "uid2", "uid3", "uid4"]
+    getLastCommand(model)[3].set_exception(RuntimeError("Failed"))
+    assert getKeys(model) == ["uid0", "uid1", "uid2", "uid3", "uid4"]
+    assert len(errors) == 1
+
+
+def test_duplicate_is_not_optimistic(errors):
+    model = createModel()
+    model.setSelectedRows([3])
+    model.duplicate_item()
+    assert getKeys(model) == ["uid0", "uid1", "uid2", "uid3", "uid4"]
+    _, _, kwargs, future = getLastCommand(model)
+    assert kwargs["params"] == {"after_uid": "uid3"}
+    assert [item["item_uid"] for item in kwargs["items"]] == ["uid3"]
+
+    error = RuntimeError("Failed")
+    future.set_exception(error)
+    assert model.planListChanges == []
+    assert errors == [("duplicate the items", error)]
+
+
+def test_remove_items_refreshes_the_queue():
+    model = createModel()
+    removed = []
+    model._re_model.run_engine._client.item_remove_batch = lambda uids: removed.append(uids)
+    model.remove_items(["uid1"])
+    assert removed == [["uid1"]]
+    assert model._re_model.refreshes == 1
+
+    model._re_model.run_engine._client.item_remove_batch = lambda uids: 1 / 0
+    with pytest.raises(ZeroDivisionError):
+        model.remove_items(["uid1"])
+    assert model._re_model.refreshes == 2
@@ -0,0 +1,62 @@
+from qtpy.QtTest import QTest
+from sophys_gui.components.list_models import QueueModel
+from helpers import FakeServerModel, ModelChecker, createItem
+
+
+def createModel(count=5):
+    re_model = FakeServerModel()
+    re_model.run_engine._plan_queue_items.extend(createItem(idx) for idx in range(count))
+    return QueueModel(re_model, "up_down")
+
+
+def getKeys(model):
+    return [model.getItemKey(item) for item in model._items]
+
+
+def getMoves(model):
+    return [
+        kwargs for command, _, kwargs, _ in model._re_model.commands
+        if command == model._re_model.run_engine._queue_items_move]
+
+
+def test_move_is_debounced():
+    model = createModel()
+    model.setSelectedRows([1])
+    model.move_down()
+    model.move_down()
+    assert getKeys(model) == ["uid0", "uid2", "uid3", "uid1", "uid4"]
+    assert getMoves(model) == []
+    QTest.qWait(model.move_debounce + 100)
+    assert getMoves(model) == [
+        {"sel_items": ["uid1"], "ref_item": "uid3", "position": "after"}]
+
+
+def test_reload_keeps_the_pending_move():
+    model = createModel()
+    checker = ModelChecker(model)
+    model.move_items_to(["uid3"], "uid0", "before")
+    assert getKeys(model) == ["uid3", "uid0", "uid1", "uid2", "uid4"]
+
+    items = [createItem(idx) for idx in (0, 2, 3, 4, 5)]
+    model.onPlanListChanged((items, "reloaded"))
+    assert getKeys(model) == ["uid3", "uid0", "uid2", "uid4", "uid5"]
+
+    model.flushMove()
+    assert getMoves(model) == [
+        {"sel_items": ["uid3"], "ref_item": "uid0", "position": "before"}]
+    model.onPlanListChanged((items, "moved"))
+    assert getKeys(model) == ["uid0", "uid2", "uid3", "uid4", "uid5"]
+    assert checker.close() == []
+
+
+def test_reload_drops_a_move_of_removed_items():
+    model = createModel()
+    model.move_items_to(["uid3", "uid4"], "uid1", "after")
+    assert getKeys(model) == ["uid0", "uid1", "uid3", "uid4", "uid2"]
+
+    items = [createItem(idx) for idx in (0, 2, 3, 4)]
+    model.onPlanListChanged((items, "reloaded"))
+    assert getKeys(model) == ["uid0", "uid2", "uid3", "uid4"]
+    assert not model.moveTimer.isActive()
+    model.flushMove()
+    assert getMoves(model) == []
@@ -0,0 +1,54 @@
+import threading
+from sophys_gui.server import ServerModel
+
+
+def createModel(tmp_path):
+    return ServerModel(
+        "http://localhost:1", poll_floor=0.01, poll_ceiling=0.01,
+        cache_path=str(tmp_path / "snapshot.msgpack"))
+
+
+def test_workers_with_the_same_name_are_joined(tmp_path):
+    model = createModel(tmp_path)
+    events = [threading.Event() for _ in range(3)]
+    workers = [model.startWorker("kafka progress", event.wait, event.set) for event in events]
+    assert [worker.name for worker in workers] == [
+        "kafka progress", "kafka progress 2", "kafka progress 3"]
+    join_times = model.exit()
+    assert not any(worker.is_alive() for worker in workers)
+    assert all(join_times[worker.name] is not None for worker in workers)
+
+
+def test_poll_interval(tmp_path):
+    model = ServerModel(
+        "http://localhost:1", poll_floor=0.2, poll_ceiling=1.0,
+        cache_path=str(tmp_path / "snapshot.msgpack"))
+    model.exit()
+    now = [1000.0]
+    model.clock = lambda: now[0]
+    model.requestRefresh = lambda: None
+    model.poll_interval = model.poll_floor
+    idle = {"manager_state": "idle"}
+
+    def poll(status=idle):
+        model.poll_interval = model.getPollInterval(status)
+        return model.poll_interval
+
+    # Back off from the floor up to the ceiling while idle
+    assert [poll() for _ in range(5)] == [0.4, 0.8, 1.0, 1.0, 1.0]
+
+    # Burst at the floor rate after a command
+    model.onCommandSent("queue_start")
+    assert model.poll_interval == 0.2
+    now[0] += model.command_burst - 0.1
+    assert poll() == 0.2
+    now[0] += 0.2
+    assert poll() == 0.4
+
+    # Stay at the floor while the manager is busy
+    assert poll({"manager_state": "executing_queue"}) == 0.2
+    assert poll({"manager_state": "executing_queue"}) == 0.2
+    assert [poll() for _ in range(3)] == [0.4, 0.8, 1.0]
+
+    # Back off while the server is unreachable
+    assert poll(None) == 1.0
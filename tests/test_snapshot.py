@@ -0,0 +1,88 @@
+import pytest
+from bluesky_widgets.models.run_engine_client import RunEngineClient
+from sophys_gui.server import ServerSnapshot
+from sophys_gui.components.list_models import QueueModel, ListFilterModel
+from sophys_gui.components.tables.table_view import SophysTable, SophysStaleLabel
+from helpers import FakeServerModel, createItem, createHistoryItem
+
+
+def createRunEngine():
+    run_engine = RunEngineClient(http_server_uri="http://localhost:1")
+    run_engine._plan_queue_items.extend(createItem(idx) for idx in range(3))
+    run_engine._plan_queue_uid = "queue"
+    run_engine._plan_history_items.extend(createHistoryItem(idx) for idx in range(5))
+    run_engine._plan_history_uid = "history"
+    run_engine._allowed_plans.update({"list_scan": {"name": "list_scan"}})
+    run_engine._allowed_plans_uid = "plans"
+    run_engine._allowed_devices.update({"motor": {"is_movable": True}})
+    run_engine._allowed_devices_uid = "devices"
+    return run_engine
+
+
+def getCaches(run_engine):
+    return (
+        list(run_engine._plan_queue_items), run_engine._plan_queue_uid,
+        list(run_engine._plan_history_items), run_engine._plan_history_uid,
+        dict(run_engine._allowed_plans), run_engine._allowed_plans_uid,
+        dict(run_engine._allowed_devices), run_engine._allowed_devices_uid)
+
+
+def test_save_and_restore(tmp_path):
+    snapshot = ServerSnapshot(str(tmp_path / "snapshot.msgpack"))
+    source = createRunEngine()
+    snapshot.save(snapshot.capture(source))
+
+    run_engine = RunEngineClient(http_server_uri="http://localhost:1")
+    snapshot.restore(run_engine, snapshot.load())
+    assert getCaches(run_engine) == getCaches(source)
+    assert run_engine._plan_queue_items_pos == {"uid0": 0, "uid1": 1, "uid2": 2}
+
+
+@pytest.mark.parametrize("key, value", [
+    ("plans_allowed", None),
+    ("devices_allowed", []),
+    ("devices_allowed_uid", 1),
+    ("plan_history_items", ["item"]),
+])
+def test_invalid_snapshot_is_not_restored(tmp_path, key, value):
+    snapshot = ServerSnapshot(str(tmp_path / "snapshot.msgpack"))
+    saved = snapshot.capture(createRunEngine())
+    saved[key] = value
+    run_engine = createRunEngine()
+    run_engine._plan_queue_items.append(createItem(10))
+    caches = getCaches(run_engine)
+    with pytest.raises(ValueError):
+        snapshot.restore(run_engine, saved)
+    assert getCaches(run_engine) == caches
+
+
+class StaleServerModel:
+
+    def __init__(self):
+        self.stale = True
+        self.subscriptions = []
+
+    def subscribe(self, predicate, callback, gui_thread=True):
+        self.subscriptions.append((predicate, callback))
+
+    def notifySubscribers(self, status):
+        for predicate, callback in self.subscriptions:
+            if predicate(status):
+                callback(status)
+
+
+def test_stale_label():
+    server_model = StaleServerModel()
+    table = SophysTable(ListFilterModel(QueueModel(FakeServerModel(), "up_down")))
+    label = SophysStaleLabel(server_model, table)
+    assert not label.isHidden()
+    assert "gray" in table.styleSheet()
+
+    server_model.notifySubscribers({})
+    assert not label.isHidden()
+    server_model.stale = False
+    server_model.notifySubscribers({})
+    assert label.isHidden()
+    assert "gray" not in table.styleSheet()
+    table.setBorder("#00ff00")
+    assert "gray" not in table.styleSheet()
@@ -0,0 +1,77 @@
+import pytest
+from sophys_gui.server import ServerModel
+from sophys_gui.server.fake import FakeHTTPServer, FakeQueueServer
+from sophys_gui.server.trace import TraceReplay, readTrace
+from helpers import waitUntil
+
+
+def getState(run_engine):
+    return (
+        list(run_engine._plan_queue_items), run_engine._plan_queue_uid,
+        list(run_engine._plan_history_items), run_engine._plan_history_uid,
+        dict(run_engine._allowed_plans), dict(run_engine._allowed_devices))
+
+
+def recordSession(server, tmp_path):
+    model = ServerModel(
+        server.start(), cache_path=str(tmp_path / "record.msgpack"),
+        trace_path=str(tmp_path / "session.trace"))
+    try:
+        client = model.run_engine._client
+        client.item_add({"name": "fake_scan_0", "item_type": "plan", "args": [], "kwargs": {}})
+        client.history_clear()
+        run_engine = model.run_engine
+        waitUntil(lambda: len(run_engine._plan_queue_items) == len(server.queue) and \
+            run_engine._plan_history_items == [])
+        return getState(run_engine)
+    finally:
+        model.exit()
+
+
+def test_fake_server_is_abstract():
+    with pytest.raises(TypeError):
+        FakeHTTPServer()
+
+
+def test_record_and_replay(tmp_path):
+    server = FakeQueueServer(queue_size=5, history_size=5, seed=0)
+    try:
+        recorded = recordSession(server, tmp_path)
+    finally:
+        server.stop()
+    assert len(recorded[0]) == 6
+    assert recorded[2] == []
+
+    header, entries = readTrace(str(tmp_path / "session.trace"))
+    endpoints = set((entry["method"], entry["endpoint"]) for entry in entries)
+    assert ("POST", "/api/queue/item/add") in endpoints
+    assert ("GET", "/api/queue/get") in endpoints
+    assert not any(endpoint.startswith("/api/auth") for _, endpoint in endpoints)
+
+    replay = TraceReplay(str(tmp_path / "session.trace"), speed=1e6)
+    model = ServerModel(replay.start(), cache_path=str(tmp_path / "replay.msgpack"))
+    try:
+        assert replay.isFinished()
+        assert getState(model.run_engine) == recorded
+    finally:
+        model.exit()
+        replay.stop()
+
+
+def test_replay_follows_the_trace_time(tmp_path):
+    server = FakeQueueServer(queue_size=1, history_size=0, seed=0)
+    try:
+        recordSession(server, tmp_path)
+    finally:
+        server.stop()
+    _, entries = readTrace(str(tmp_path / "session.trace"))
+    statuses = [entry for entry in entries if entry["endpoint"] == "/api/status"]
+
+    replay = TraceReplay(str(tmp_path / "session.trace"))
+    assert replay.getTraceTime() == 0
+    assert replay.handle("GET", "/api/status", {}, {}) == (200, statuses[0]["response"])
+    replay.start_time = 0
+    assert replay.isFinished()
+    assert replay.handle("GET", "/api/status", {}, {}) == (200, statuses[-1]["response"])
+    assert replay.handle("GET", "/api/unknown", {}, {})[0] == 404
+    assert replay.handle("POST", "/api/unknown", {}, {}) == (200, {"success": True, "msg": ""})